@@ -0,0 +1,116 @@
+import numpy as np
+
+
+class BVH:
+    """hiérarchie de volumes englobants (boîtes alignées sur les axes) sur un ensemble d'objets"""
+    def __init__(self, boxes_min, boxes_max, leaf_size: int=4):
+        self.boxes_min = np.asarray(boxes_min, dtype=np.float32).reshape(-1, 3) # boîte de chaque objet (N, 3)
+        self.boxes_max = np.asarray(boxes_max, dtype=np.float32).reshape(-1, 3)
+        self.leaf_size = leaf_size # nombre maximal d'objets par feuille
+
+        # noeuds stockés à plat : un noeud couvre order[start:start + count]
+        self.order = np.arange(len(self.boxes_min)) # objets réordonnés pour que chaque sous-arbre soit contigu
+        self.nodes_min = []
+        self.nodes_max = []
+        self.nodes_start = []
+        self.nodes_count = []
+        self.nodes_left = [] # enfants (-1 pour une feuille)
+        self.nodes_right = []
+        self.build()
+
+    def __len__(self):
+        return len(self.boxes_min)
+
+    def build(self):
+        """construit l'arbre en coupant à la médiane selon l'axe le plus étendu des centres"""
+        if not len(self):
+            return
+        centers = (self.boxes_min + self.boxes_max) * 0.5
+        stack = [(self.new_node(0, len(self)), 0, len(self))]
+        while stack:
+            node, start, end = stack.pop()
+            if end - start <= self.leaf_size:
+                continue
+            items = self.order[start:end]
+            extent = centers[items].max(axis=0) - centers[items].min(axis=0)
+            axis = int(np.argmax(extent))
+            middle = (end - start) // 2
+            self.order[start:end] = items[np.argpartition(centers[items, axis], middle)]
+
+            left = self.new_node(start, start + middle)
+            right = self.new_node(start + middle, end)
+            self.nodes_left[node], self.nodes_right[node] = left, right
+            stack.append((left, start, start + middle))
+            stack.append((right, start + middle, end))
+
+        self.nodes_min = np.array(self.nodes_min, dtype=np.float32)
+        self.nodes_max = np.array(self.nodes_max, dtype=np.float32)
+        self.nodes_start = np.array(self.nodes_start, dtype=np.int64)
+        self.nodes_count = np.array(self.nodes_count, dtype=np.int64)
+        self.nodes_left = np.array(self.nodes_left, dtype=np.int64)
+        self.nodes_right = np.array(self.nodes_right, dtype=np.int64)
+
+    def new_node(self, start: int, end: int):
+        """ajoute un noeud englobant order[start:end] et renvoie son indice"""
+        items = self.order[start:end]
+        self.nodes_min.append(self.boxes_min[items].min(axis=0))
+        self.nodes_max.append(self.boxes_max[items].max(axis=0))
+        self.nodes_start.append(start)
+        self.nodes_count.append(end - start)
+        self.nodes_left.append(-1)
+        self.nodes_right.append(-1)
+        return len(self.nodes_start) - 1
+
+    def query(self, planes):
+        """renvoie les indices (triés) des objets dont la boîte intersecte le frustum
+        les sous-arbres entièrement dehors sont rejetés, ceux entièrement dedans acceptés sans autre test"""
+        if not len(self):
+            return np.empty(0, dtype=np.int64)
+        accepted = [] # plages (début, nombre) de self.order
+        candidates = [] # objets des feuilles partiellement visibles, testés individuellement
+        frontier = np.zeros(1, dtype=np.int64)
+        while len(frontier):
+            outside, inside = classify_boxes(self.nodes_min[frontier], self.nodes_max[frontier], planes)
+            accepted.append(frontier[inside])
+            frontier = frontier[~outside & ~inside]
+            leaf = self.nodes_left[frontier] < 0
+            candidates.append(frontier[leaf])
+            frontier = np.concatenate([self.nodes_left[frontier[~leaf]], self.nodes_right[frontier[~leaf]]])
+
+        nodes = np.concatenate(accepted)
+        visible = [self.order[ranges_indices(self.nodes_start[nodes], self.nodes_count[nodes])]]
+        leaves = np.concatenate(candidates)
+        if len(leaves):
+            items = self.order[ranges_indices(self.nodes_start[leaves], self.nodes_count[leaves])]
+            outside, _ = classify_boxes(self.boxes_min[items], self.boxes_max[items], planes)
+            visible.append(items[~outside])
+        return np.sort(np.concatenate(visible))
+
+
+def frustum_planes(matrix, near: float, far: float):
+    """renvoie les 6 plans (a, b, c, d) du frustum d'une matrice vue-projection (6, 4)
+    un point p est du côté visible d'un plan si a * x + b * y + c * z + d >= 0
+    les plans proche et éloigné sont tirés de w (= -z caméra) : near <= w <= far"""
+    m = np.asarray(matrix, dtype=np.float64)
+    return np.array([m[3] + m[0], m[3] - m[0],                       # gauche, droite
+                     m[3] + m[1], m[3] - m[1],                       # bas, haut
+                     m[3] - [0, 0, 0, near], [0, 0, 0, far] - m[3]]) # proche, éloigné
+
+
+def classify_boxes(boxes_min, boxes_max, planes):
+    """renvoie les masques (entièrement dehors, entièrement dedans) de boîtes (N, 3) face aux plans (6, 4)"""
+    normals = planes[:, :3]
+    positive = normals >= 0
+    # sommet le plus avancé (p) et le plus en retrait (n) de chaque boîte selon la normale de chaque plan
+    p = np.where(positive, boxes_max[:, None, :], boxes_min[:, None, :])
+    n = np.where(positive, boxes_min[:, None, :], boxes_max[:, None, :])
+    outside = ((p * normals).sum(axis=2) + planes[:, 3] < 0).any(axis=1)
+    inside = ((n * normals).sum(axis=2) + planes[:, 3] >= 0).all(axis=1)
+    return outside, inside
+
+
+def ranges_indices(starts, counts):
+    """concatène les plages [start, start + count) en un seul tableau d'indices"""
+    counts = np.asarray(counts, dtype=np.int64)
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(np.asarray(starts, dtype=np.int64) - offsets, counts) + np.arange(counts.sum())
@@ -0,0 +1,66 @@
+import numpy as np
+
+# plans de découpage en espace homogène : un sommet v est du côté visible du plan k si v · NORMALS[k] + offset_k >= 0
+# gauche, droite, bas, haut (-w <= x, y <= w) puis proche et éloigné (near <= w <= far, w = -z caméra)
+NORMALS = np.array([[1, 0, 0, 1], [-1, 0, 0, 1],
+                    [0, 1, 0, 1], [0, -1, 0, 1],
+                    [0, 0, 0, 1], [0, 0, 0, -1]], dtype=np.float32)
+
+
+def plane_offsets(near: float, far: float):
+    """renvoie les termes constants des 6 plans de découpage"""
+    return np.array([0, 0, 0, 0, -near, far], dtype=np.float32)
+
+
+def outcodes(V_clip, near: float, far: float):
+    """renvoie pour chaque sommet (N, 4) le masque de bits des plans dont il est du mauvais côté (N,)"""
+    distances = V_clip @ NORMALS.T + plane_offsets(near, far)
+    return ((distances < 0) * (1 << np.arange(len(NORMALS)))).sum(axis=1)
+
+
+def clip_triangles(triangles, near: float, far: float, planes: int=(1 << len(NORMALS)) - 1):
+    """découpe des triangles (T, 3, 4) en espace homogène par Sutherland-Hodgman, tous les triangles à la fois
+    renvoie (triangles (M, 3, 4), indice du triangle d'origine de chacun (M,)) après triangulation en éventail
+    planes : masque des plans utilisés (tous par défaut)"""
+    offsets = plane_offsets(near, far)
+    polygons = np.asarray(triangles, dtype=np.float32)
+    counts = np.full(len(polygons), 3)
+    source = np.arange(len(polygons))
+
+    for k in range(len(NORMALS)):
+        if not planes >> k & 1:
+            continue
+        distances = polygons @ NORMALS[k] + offsets[k]
+        slots = np.arange(polygons.shape[1])
+        valid = slots < counts[:, None]
+        if not ((distances < 0) & valid).any():
+            continue
+
+        # arête (i, i + 1) de chaque polygone : sommet i conservé s'il est dedans, intersection si l'arête traverse le plan
+        following = np.where(slots + 1 < counts[:, None], slots + 1, 0)
+        next_points = np.take_along_axis(polygons, following[:, :, None], axis=1)
+        next_distances = np.take_along_axis(distances, following, axis=1)
+        inside = distances >= 0
+        crossing = valid & (inside != (next_distances >= 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.where(crossing, distances / (distances - next_distances), 0)
+        intersections = polygons + t[:, :, None] * (next_points - polygons)
+
+        # compactage : chaque emplacement produit au plus 2 sommets (le sommet puis l'intersection)
+        points = np.stack([polygons, intersections], axis=2).reshape(len(polygons), -1, 4)
+        emitted = np.stack([valid & inside, crossing], axis=2).reshape(len(polygons), -1)
+        counts = emitted.sum(axis=1)
+        kept = counts >= 3 # polygones entièrement dehors ou réduits à un segment supprimés
+        points, emitted, counts, source = points[kept], emitted[kept], counts[kept], source[kept]
+
+        positions = np.cumsum(emitted, axis=1) - 1
+        polygons = np.zeros((len(points), max(int(counts.max(initial=0)), 3), 4), dtype=np.float32)
+        rows = np.broadcast_to(np.arange(len(points))[:, None], emitted.shape)
+        polygons[rows[emitted], positions[emitted]] = points[emitted]
+
+    # triangulation en éventail (0, i, i + 1) des polygones convexes obtenus
+    fans = counts - 2
+    owner = np.repeat(np.arange(len(polygons)), fans)
+    i = np.arange(len(owner)) - np.repeat(np.cumsum(fans) - fans, fans) + 1
+    result = np.stack([polygons[owner, 0], polygons[owner, i], polygons[owner, i + 1]], axis=1)
+    return result, source[owner]
@@ -1,50 +1,360 @@
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
 import numpy as np
+from _mesh_cache import load_mesh_cache, save_mesh_cache
+from _lod import cached_lods, load_lods
+
 
 class DataManager:
     """Classe pour gérer l'import de fichiers .obj"""
-    
-    def __init__(self, env):
+
+    def __init__(self, env, max_workers: int=None):
         self.env = env
         self.vertices = []
         self.indexes = []
 
-    def load_obj(self, filepath: str):
-        """Charge un fichier .obj et extrait les vertices et faces"""
-        self.vertices = []
-        self.indexes = []
+        # chargement en arrière-plan
+        self.max_workers = max_workers # nombre de processus d'analyse (None : nombre de coeurs)
+        self.executor = None # créé au premier chargement asynchrone
+        self.shared_blocks = [] # mémoires partagées des tableaux reçus (maintenues ouvertes)
 
+    def load_obj(self, filepath: str, use_cache: bool=True, progress=None):
+        """Charge un fichier .obj (ou son cache binaire) et extrait les vertices et faces
+        progress(octets lus, taille totale) est appelé après chaque bloc analysé"""
         filepath = self.env.main.get_path(filepath)
-        with open(filepath, 'r') as f:
-            for line in f:
-                if line.startswith('v '):
-                    # vertex
-                    parts = line.strip().split()
-                    x, y, z = map(float, parts[1:4])
-                    self.vertices.append([x, y, z])
-                
-                elif line.startswith('f '):
-                    # face (triangle ou quad)
-                    parts = line.strip().split()[1:]
-                    face_indices = []
-                    for p in parts:
-                        # chaque élément peut être 'v', 'v/vt', 'v//vn' ou 'v/vt/vn'
-                        idx = int(p.split('/')[0]) - 1  # OBJ indices commencent à 1
-                        face_indices.append(idx)
-                    
-                    # convertir en triangles si nécessaire
-                    if len(face_indices) == 3:
-                        self.indexes.append(face_indices)
-                    elif len(face_indices) == 4:
-                        # quad → deux triangles
-                        self.indexes.append([face_indices[0], face_indices[1], face_indices[2]])
-                        self.indexes.append([face_indices[0], face_indices[2], face_indices[3]])
-                    else:
-                        # polygone à plus de 4 sommets → triangulation simple (fan)
-                        for i in range(1, len(face_indices) - 1):
-                            self.indexes.append([face_indices[0], face_indices[i], face_indices[i+1]])
-
-        # convertir en np.array pour usage direct
-        self.vertices = np.array(self.vertices, dtype=np.float32)
-        self.indexes = np.array(self.indexes, dtype=np.int32)
-
-        return self.vertices, self.indexes
\ No newline at end of file
+        self.vertices, self.indexes = load_obj_file(filepath, use_cache, progress)
+        return self.vertices, self.indexes
+
+    def parse_obj(self, filepath: str, chunk_size: int=1 << 20, progress=None):
+        """Analyse un fichier .obj par blocs de taille fixe, la mémoire reste proche de la taille finale"""
+        self.vertices, self.indexes = parse_obj_file(filepath, chunk_size, progress)
+        return self.vertices, self.indexes
+
+    def load_obj_async(self, filepath: str, use_cache: bool=True, lod: bool=True):
+        """Lance le chargement d'un fichier .obj dans un processus séparé, renvoie un AssetHandle
+        si le cache binaire est valide, il est projeté en mémoire immédiatement (handle déjà terminé)
+        lod : génère aussi (ou relit sur le disque) les niveaux de détail du mesh"""
+        filepath = self.env.main.get_path(filepath)
+        if use_cache: # cache valide : projeté directement en mémoire, sans processus ni copie
+            cached = load_obj_cached(filepath, lod)
+            if cached is not None:
+                handle = AssetHandle(self, filepath, None)
+                handle.arrays, handle.lods = cached
+                return handle
+
+        if self.executor is None:
+            # "spawn" : les processus ne copient ni la fenêtre pygame ni les threads du processus principal
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        # progression (octets analysés, taille totale) écrite par le processus d'analyse en mémoire partagée
+        counter = shared_memory.SharedMemory(create=True, size=16)
+        np.ndarray(2, dtype=np.int64, buffer=counter.buf)[:] = (0, os.path.getsize(filepath))
+        future = self.executor.submit(load_obj_shared, filepath, use_cache, lod, counter.name)
+        return AssetHandle(self, filepath, future, counter)
+
+    def attach_shared(self, descriptors: list):
+        """reconstruit les tableaux placés en mémoire partagée par un processus d'analyse (sans copie)"""
+        arrays = []
+        for name, shape, dtype in descriptors:
+            if name is None: # tableau vide
+                arrays.append(np.empty(shape, dtype=dtype))
+                continue
+            block = shared_memory.SharedMemory(name=name)
+            block.unlink() # le segment disparaît dès que plus aucun processus ne le projette
+            self.shared_blocks.append(block)
+            arrays.append(np.ndarray(shape, dtype=dtype, buffer=block.buf))
+        return arrays
+
+    def shutdown(self):
+        """arrête les processus d'analyse"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+class AssetHandle:
+    """chargement asynchrone d'un fichier .obj"""
+    def __init__(self, data_manager: DataManager, filepath: str, future, counter=None):
+        self.data_manager = data_manager
+        self.filepath = filepath
+        self.future = future # None si les tableaux ont été lus directement depuis le cache
+        self.counter = counter # mémoire partagée de la progression (libérée à la réception du résultat)
+        self.arrays = None # (vertices, indexes) une fois reçus
+        self.lods = [] # niveaux de détail [(indexes, faces d'origine), ...] une fois reçus
+
+    def done(self):
+        """indique si le chargement est terminé"""
+        return self.future is None or self.future.done()
+
+    def progress(self):
+        """renvoie (octets analysés, taille totale) du fichier"""
+        if self.counter is None:
+            return (1, 1)
+        done, total = np.ndarray(2, dtype=np.int64, buffer=self.counter.buf).tolist()
+        return (total, total) if self.done() else (done, total)
+
+    def result(self, timeout: float=None):
+        """renvoie (vertices, indexes), en attendant la fin du chargement si nécessaire
+        l'exception du processus d'analyse est relancée si le chargement a échoué"""
+        if self.arrays is None:
+            try:
+                descriptors = self.future.result(timeout)
+            finally:
+                if self.future.done(): # résultat reçu ou échec : la progression n'est plus lue
+                    self.release_counter()
+            arrays = self.data_manager.attach_shared(descriptors)
+            self.arrays = tuple(arrays[:2])
+            self.lods = list(zip(arrays[2::2], arrays[3::2]))
+        return self.arrays
+
+    def release_counter(self):
+        """libère la mémoire partagée de la progression"""
+        if self.counter is not None:
+            self.counter.close()
+            self.counter.unlink()
+            self.counter = None
+
+
+def load_obj_file(filepath: str, use_cache: bool=True, progress=None):
+    """charge un fichier .obj depuis son cache binaire ou en l'analysant (puis crée le cache)"""
+    # cache binaire projeté en mémoire
+    if use_cache:
+        cache = load_mesh_cache(filepath)
+        if cache is not None:
+            return cache["vertices"], cache["indexes"]
+
+    vertices, indexes = parse_obj_file(filepath, progress=progress)
+    if use_cache:
+        save_mesh_cache(filepath, {"vertices": vertices, "indexes": indexes})
+    return vertices, indexes
+
+
+def load_obj_cached(filepath: str, lod: bool=False):
+    """renvoie ((vertices, indexes), niveaux de détail) projetés depuis les caches, None s'il faut analyser le fichier"""
+    cache = load_mesh_cache(filepath)
+    if cache is None:
+        return None
+    lods = cached_lods(filepath) if lod else []
+    if lods is None:
+        return None
+    return (cache["vertices"], cache["indexes"]), lods
+
+
+def load_obj_shared(filepath: str, use_cache: bool=True, lod: bool=False, counter: str=None):
+    """charge un fichier .obj dans un processus d'analyse et place les tableaux en mémoire partagée
+    tableaux transmis : vertices, indexes puis indexes et faces de chaque niveau de détail
+    counter : mémoire partagée où écrire la progression de l'analyse (octets lus, taille totale)"""
+    block = shared_memory.SharedMemory(name=counter) if counter is not None else None
+
+    def progress(done: int, total: int):
+        np.ndarray(2, dtype=np.int64, buffer=block.buf)[:] = (done, total)
+
+    arrays = list(load_obj_file(filepath, use_cache, progress if block is not None else None))
+    if block is not None:
+        block.close()
+    if lod:
+        for lod_indexes, faces in load_lods(filepath, *arrays, use_cache=use_cache):
+            arrays += [lod_indexes, faces]
+
+    descriptors = []
+    for array in arrays:
+        if not array.nbytes:
+            descriptors.append((None, array.shape, array.dtype.str))
+            continue
+        block = shared_memory.SharedMemory(create=True, size=array.nbytes)
+        resource_tracker.unregister(block._name, "shared_memory") # le processus principal en devient responsable
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+        descriptors.append((block.name, array.shape, array.dtype.str))
+        block.close()
+    return descriptors
+
+
+def parse_obj_file(filepath: str, chunk_size: int=1 << 20, progress=None):
+    """analyse un fichier .obj par blocs de taille fixe dans des tableaux extensibles"""
+    total = os.path.getsize(filepath)
+    vertices = GrowableArray((3,), np.float32)
+    indexes = GrowableArray((3,), np.int32)
+
+    with open(filepath, 'rb') as f:
+        remainder = b""
+        done = 0
+        while True:
+            chunk = f.read(chunk_size)
+            done += len(chunk)
+
+            # seules les lignes complètes sont analysées, la fin est reportée au bloc suivant
+            data = remainder + chunk
+            cut = data.rfind(b"\n") + 1 if chunk else len(data)
+            lines, remainder = data[:cut], data[cut:]
+
+            if lines:
+                V, I = parse_obj_bytes(lines) # indices OBJ absolus : aucun décalage entre blocs
+                if not len(vertices.data): # capacité initiale estimée d'après la densité du premier bloc
+                    scale = total / max(done, 1)
+                    vertices.reserve(int(len(V) * scale * 1.05))
+                    indexes.reserve(int(len(I) * scale * 1.05))
+                vertices.extend(V)
+                indexes.extend(I)
+
+            if progress is not None:
+                progress(done, total)
+            if not chunk:
+                break
+
+    return flat_if_empty(vertices.trimmed()), flat_if_empty(indexes.trimmed())
+
+
+class GrowableArray:
+    """tableau numpy extensible par ajout de lignes (capacité doublée si nécessaire)"""
+    def __init__(self, shape: tuple, dtype):
+        self.data = np.empty((0,) + shape, dtype=dtype)
+        self.size = 0 # nombre de lignes utilisées
+
+    def reserve(self, capacity: int):
+        """garantit une capacité d'au moins capacity lignes"""
+        if capacity > len(self.data):
+            grown = np.empty((capacity,) + self.data.shape[1:], dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+
+    def extend(self, rows):
+        """ajoute des lignes à la fin du tableau"""
+        end = self.size + len(rows)
+        if end > len(self.data):
+            self.reserve(max(end, 2 * len(self.data)))
+        self.data[self.size:end] = rows
+        self.size = end
+
+    def trimmed(self):
+        """renvoie le tableau réduit à sa taille utile (libère la capacité excédentaire)"""
+        if self.size < len(self.data):
+            self.data.resize((self.size,) + self.data.shape[1:], refcheck=False)
+        return self.data
+
+
+def parse_obj_bytes(data: bytes):
+    """analyse vectorisée du contenu d'un fichier .obj, renvoie les vertexs (N, 3) et triangles (T, 3)"""
+    if b"#" in data: # commentaires (lignes entières ou fin de ligne) retirés avant conversion
+        data = re.sub(rb"#[^\n]*", b"", data)
+    if data and not data.endswith(b"\n"): # dernière ligne terminée par un retour à la ligne
+        data += b"\n"
+    raw = np.frombuffer(data, dtype=np.uint8)
+
+    # début et fin de chaque ligne
+    ends = np.flatnonzero(raw == 10) + 1
+    starts = np.concatenate(([0], ends))[:len(ends)]
+
+    # type de ligne d'après les deux premiers caractères
+    first = raw[starts]
+    second = raw[np.minimum(starts + 1, len(raw) - 1)]
+    vertex_lines = (first == ord('v')) & (second == ord(' '))
+    face_lines = (first == ord('f')) & (second == ord(' '))
+
+    # vertexs : le mot-clé 'v' n'apparaît dans aucun nombre, il est simplement retiré
+    block, _ = select_lines(data, raw, starts, ends, vertex_lines)
+    vertices = parse_vertices(block.translate(None, b"v"), int(vertex_lines.sum()))
+
+    # faces : le mot-clé 'f' est remplacé par un espace pour conserver les séparateurs
+    block, line_ends = select_lines(data, raw, starts, ends, face_lines)
+    values, arity = parse_face_tokens(block.replace(b"f", b" "), line_ends)
+    indexes = fan_triangulate(values - 1, arity) # OBJ indices commencent à 1
+    return vertices, indexes
+
+
+def flat_if_empty(array):
+    """tableau vide : forme (0,) comme le chargeur d'origine (np.array([]))"""
+    return array if len(array) else array.reshape(0)
+
+
+def select_lines(data: bytes, raw, starts, ends, selected):
+    """renvoie les octets des lignes sélectionnées concaténés, et la fin de chaque ligne dans ce bloc"""
+    line_ends = np.cumsum((ends - starts)[selected])
+
+    # plages contiguës de lignes sélectionnées (en pratique quelques blocs par fichier)
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], selected, [False])).astype(np.int8)))
+    run_starts, run_ends = starts[edges[0::2]], ends[edges[1::2] - 1]
+    if len(run_starts) <= 4096:
+        block = b"".join(data[a:b] for a, b in zip(run_starts.tolist(), run_ends.tolist()))
+    else:
+        block = raw[np.repeat(selected, ends - starts)].tobytes()
+    return block, line_ends
+
+
+def parse_vertices(block: bytes, n_lines: int):
+    """analyse les coordonnées des lignes 'v', renvoie les 3 premières de chaque ligne (N, 3)"""
+    try:
+        values = np.fromstring(block, dtype=np.float64, sep=' ')
+    except ValueError: # élément non numérique après les coordonnées : 3 premiers éléments de chaque ligne
+        return np.array([[float(token) for token in line.split()[:3]] for line in block.splitlines() if line.strip()],
+                        dtype=np.float64).reshape(-1, 3).astype(np.float32)
+    if len(values) == 3 * n_lines: # cas courant : 'v x y z'
+        return values.reshape(n_lines, 3).astype(np.float32)
+
+    # lignes de tailles variables ('v x y z w', couleurs par sommet...)
+    raw = np.frombuffer(block, dtype=np.uint8)
+    space = raw <= 32
+    token_start = ~space
+    token_start[1:] &= space[:-1]
+    counts = np.cumsum(token_start, dtype=np.int64)[raw == 10]
+    arity = np.diff(counts, prepend=0)
+    if len(values) != arity.sum() or (arity < 3).any():
+        raise ValueError("ligne 'v' invalide dans le fichier .obj")
+    offsets = np.cumsum(arity) - arity
+    return values[offsets[:, None] + np.arange(3)].astype(np.float32)
+
+
+def parse_face_tokens(block: bytes, line_ends):
+    """analyse les lignes 'f', renvoie (indice de sommet de chaque élément, nombre d'éléments par ligne)"""
+    if block.translate(None, b"0123456789/- \t\r\n\x0b\x0c"):
+        raise ValueError("ligne 'f' invalide dans le fichier .obj")
+    raw = np.frombuffer(block, dtype=np.uint8)
+    if not len(raw):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    # séquences de chiffres [début, fin[
+    digits = raw - np.uint8(48)
+    is_digit = digits < 10
+    edges = np.empty(len(raw) + 1, dtype=bool)
+    edges[0], edges[-1] = is_digit[0], is_digit[-1]
+    np.not_equal(is_digit[1:], is_digit[:-1], out=edges[1:-1])
+    edges = np.flatnonzero(edges)
+    run_starts, run_ends = edges[0::2], edges[1::2]
+
+    # seule la première séquence d'un élément ('v' de 'v/vt/vn') suit un séparateur, éventuellement signée
+    before = raw[run_starts - 1]
+    negative = before == ord('-')
+    if negative.any():
+        before = np.where(negative, raw[run_starts - 2], before)
+    keep = np.flatnonzero(before <= 32)
+    run_ends, lengths, negative = run_ends[keep], (run_ends - run_starts)[keep], negative[keep]
+
+    # conversion des chiffres par la méthode de Horner, en partant des unités
+    values = digits[run_ends - 1].astype(np.int64)
+    power = np.int64(1)
+    for k in range(2, int(lengths.max(initial=0)) + 1):
+        power *= 10
+        long_enough = np.flatnonzero(lengths >= k)
+        values[long_enough] += digits[run_ends[long_enough] - k] * power
+    values[negative] *= -1
+
+    # nombre d'éléments par ligne
+    counts = np.searchsorted(run_ends, line_ends)
+    arity = np.diff(counts, prepend=0)
+    return values, arity
+
+
+def fan_triangulate(values, arity):
+    """triangulation en éventail de polygones quelconques, renvoie les triangles (T, 3)"""
+    offsets = np.cumsum(arity) - arity            # début de chaque face
+    n_triangles = np.maximum(arity - 2, 0)        # nombre de triangles par face
+    faces = np.repeat(np.arange(len(arity)), n_triangles)
+
+    # rang du triangle dans sa face : triangle j -> sommets (0, j, j+1)
+    first = np.cumsum(n_triangles) - n_triangles
+    j = np.arange(len(faces)) - first[faces] + 1
+
+    start = offsets[faces]
+    indexes = np.stack([values[start], values[start + j], values[start + j + 1]], axis=1)
+    return indexes.astype(np.int32).reshape(-1, 3)
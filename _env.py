@@ -1,143 +1,386 @@
+import sys
 import numpy as np
 from _data_manager import DataManager
+from _scene_buffer import SceneBuffer
+from _bvh import frustum_planes, classify_boxes
+from _clipping import outcodes, clip_triangles
+from _lod import LOD_SIZES, select_level
+from _instancing import InstancedMesh, translation
+from _scene_graph import SceneGraph
+from _lighting import Lighting, face_data, transform_faces
 
 
 class Environnement:
     """environnement 3D contenant les objets de la scène"""
-    def __init__(self, main):
+    def __init__(self, main, default_scene: bool=True):
         self.main = main
         self.objects = []
+        self.graph = SceneGraph() # transformations des objets de la scène (un noeud par objet)
+        self.scene_buffer = SceneBuffer(self.graph) # tampons partagés des objets statiques
+        self.dynamic_objects = [] # objets déplacés fréquemment, transformés individuellement
+        self.instances = [] # meshs partagés dessinés à de nombreuses positions (InstancedMesh)
+        self.pending = [] # chargements en cours (handle, options d'ajout)
+        self.frustum_culling = True # rejet des objets hors du champ de vision avant toute transformation
+        self.lod = True # niveau de détail choisi selon la taille projetée des objets
+        self.lighting = Lighting() # éclairage de Lambert par triangle
+        self.version = 0 # incrémenté à chaque ajout d'objet
 
         # gestionnaire de données
         self.data_manager = DataManager(self)
 
-        # arbre
-        vertices, indexes = self.data_manager.load_obj("objects/human.obj")
-        h = Object(vertices, indexes)
-        self.objects.append(h)
+        if default_scene:
+            self.load_default_scene()
 
-        # cube
+    def load_default_scene(self):
+        """scène de démonstration : un humain et un bloc de 27 cubes"""
+        # humain (chargé en arrière-plan, ajouté à la scène une fois prêt)
+        self.load("objects/human.obj")
+
+        # cubes : un seul mesh partagé, une matrice de translation par cube
+        cubes = self.add_instances(InstancedMesh(Cube.create_mesh([0, 0, 0], 1, color=[(255, 0, 0), (0, 255, 0), (0, 0, 255)])))
         for i in range(3):
             for j in range(3):
                 for k in range(3):
-                    cube1 = Cube([i * 1.1, j * 1.1, -10 + k * 1.1], 1, color=[(255, 0, 0), (0, 255, 0), (0, 0, 255)])
-                    self.add(cube1)
+                    cubes.add(translation([i * 1.1, j * 1.1, -10 + k * 1.1]))
 
-    def add(self, obj: object):
-        """ajoute un objet à la scène"""
+    def add(self, obj: object, dynamic: bool=False):
+        """ajoute un objet à la scène (son noeud et ceux de sa hiérarchie rejoignent le graphe de la scène)"""
+        obj.attach(self.graph)
         self.objects.append(obj)
+        if dynamic:
+            self.dynamic_objects.append(obj)
+        else:
+            self.scene_buffer.add(obj)
+        self.version += 1
     
+    def add_instances(self, instances):
+        """ajoute à la scène un mesh partagé instancié (InstancedMesh)"""
+        self.instances.append(instances)
+        self.version += 1
+        return instances
+
+    def state(self):
+        """renvoie un état comparable de la scène : identique d'une frame à l'autre si rien n'a changé
+        (objets ajoutés, transformations, instances, éclairage, options de rendu)"""
+        lighting = self.lighting
+        return (self.version, self.graph.version, tuple(instances.version for instances in self.instances),
+                lighting.enabled, lighting.version, self.frustum_culling, self.lod)
+
+    def load(self, filepath: str, dynamic: bool=False, setup=None, lod: bool=True):
+        """charge un fichier .obj en arrière-plan, l'objet est ajouté à la scène entre deux frames
+        setup(objet) est appelé avant l'ajout (position, rotation...)"""
+        handle = self.data_manager.load_obj_async(filepath, lod=lod)
+        self.pending.append((handle, dynamic, setup))
+        return handle
+
+    def progress(self):
+        """renvoie la progression cumulée (octets analysés, taille totale) des chargements en cours, None si aucun"""
+        if not self.pending:
+            return None
+        progress = [handle.progress() for handle, _, _ in self.pending]
+        return sum(done for done, _ in progress), sum(total for _, total in progress)
+
+    def update(self):
+        """ajoute à la scène les objets dont le chargement est terminé"""
+        if not self.pending:
+            return
+        pending = []
+        for handle, dynamic, setup in self.pending:
+            if not handle.done():
+                pending.append((handle, dynamic, setup))
+                continue
+            try:
+                obj = Object(*handle.result(), lods=handle.lods)
+            except Exception as error: # fichier illisible ou invalide : signalé, la scène continue sans l'objet
+                print(f"chargement de {handle.filepath} impossible : {error!r}", file=sys.stderr)
+                continue
+            if setup is not None:
+                setup(obj)
+            self.add(obj, dynamic=dynamic)
+        self.pending = pending
+
     @property
     def screen_triangles(self):
-        """renvoie l'ensemble des triangles à afficher"""
-        triangles = [] # liste de tous les triangles
-        for obj in self.objects: # parcours l'ensemble des objets
-            mesh = obj.mesh # raccourci
-
-            # espace monde
-            V_h = mesh.world_vertices()
-
-            # référentiel de la caméra
-            V_camera = mesh.camera_vertices(V_h, self.main.pov.view_matrix)
-
-            # espace de découpage
-            V_clip = mesh.clip_vertices(V_camera, self.main.pov.projection_matrix)
-
-            # mask frustum
-            V_clip_mask, V_crossing_mask = mesh.clip_mask(V_clip)
-
-            # espace ndc
-            V_ndc = mesh.ndc_vertices(V_clip)
-
-            # récupération des vertexs à l'écran
-            V_screen = mesh.screen_vertices(V_ndc, (self.main.screen_width, self.main.screen_height))
-
-            # chaque triangle
-            for i, index in enumerate(mesh.indexes):
-                # frustum clipping
-                visible = sum(int(V_clip_mask[idx]) for idx in index)
-                if visible == 0:
-                    continue
-
-                elif visible < 3:
-                    crossing = ( V_crossing_mask[0] & V_crossing_mask[1] & V_crossing_mask[2])
-                    if not crossing:
-                        continue
-
-                # triangle en espace caméra pour les calculs
-                triangle_camera = [V_camera[index[0]][:3], V_camera[index[1]][:3], V_camera[index[2]][:3]]
-
-                # back-face culling
-                normale = self.triangle_normale(triangle_camera)
-                if not self.bf_culling(triangle_camera, normale):
-                    continue
-
-                # formation du triangle
-                depth = (V_camera[index[0]][2] + V_camera[index[1]][2] + V_camera[index[2]][2]) / 3
-                triangle = [V_screen[index[0]], V_screen[index[1]], V_screen[index[2]], depth, mesh.get_color(i)]
-
-                triangles.append(triangle)
-        return triangles
+        """renvoie l'ensemble des triangles à afficher (adaptateur liste sur screen_batch)"""
+        return self.screen_batch().to_list()
+
+    def screen_batch(self, size: tuple=None):
+        """renvoie l'ensemble des triangles à afficher sous forme de tableaux compacts
+        size : taille en pixels de la surface cible (par défaut l'écran virtuel)"""
+        size = size or (self.main.screen_width, self.main.screen_height)
+        profiler = self.main.profiler
+        pov = self.main.pov
+        view_projection = pov.view_projection # matrice vue-projection en cache dans la caméra
+        planes = frustum_planes(view_projection, pov.near, pov.far)
+
+        # objets statiques : une seule multiplication pour les objets du tampon intersectant le frustum
+        with profiler.scope("scene.graph"):
+            self.graph.update() # matrices monde de tous les objets modifiés en une passe
+        buffer = self.scene_buffer
+        with profiler.scope("scene.frustum"):
+            buffer.refresh()
+            visible = buffer.visible(planes) if self.frustum_culling else None
+        profiler.count("objects.visible", len(buffer.entries) if visible is None else len(visible))
+        if self.lod and buffer.lod_entries:
+            with profiler.scope("scene.lod"):
+                entries = buffer.lod_entries if visible is None else np.intersect1d(buffer.lod_entries, visible).tolist()
+                objects = [buffer.entries[i][0] for i in entries]
+                for i, obj, level in zip(entries, objects, self.lod_levels(objects, size)):
+                    if level != obj.lod_level:
+                        buffer.write_level(i, level)
+        with profiler.scope("scene.select"):
+            vertices, indexes, colors, faces = buffer.select(visible)
+        batches = [self.vertices_batch(vertices, indexes, colors, view_projection, size, faces)]
+
+        # objets dynamiques : test de la boîte englobante puis matrice modèle-vue-projection fusionnée par objet
+        dynamic_objects = self.visible_objects(self.dynamic_objects, planes) if self.frustum_culling else self.dynamic_objects
+        if self.lod:
+            for obj, level in zip(dynamic_objects, self.lod_levels(dynamic_objects, size)):
+                obj.lod_level = level
+        for obj in dynamic_objects:
+            mvp = view_projection @ obj.transform_matrix
+            mesh, level = obj.mesh, obj.lod_level
+            faces = obj.world_faces(level) if self.lighting.enabled else None
+            batches.append(self.vertices_batch(mesh.vertices_homogeneous, mesh.lod_indexes[level], mesh.lod_colors[level], mvp, size, faces))
+
+        # instances : culling par instance puis transformation groupée
+        for instances in self.instances:
+            batches.append(self.instances_batch(instances, view_projection, planes, size))
+        return TriangleBatch.concatenate(batches)
+
+    def lod_levels(self, objects: list, size: tuple):
+        """renvoie le niveau de détail de chaque objet d'après la taille projetée de sa sphère englobante (pixels)"""
+        if not objects:
+            return []
+        bounds = [obj.world_bounds() for obj in objects]
+        lo, hi = np.array([b[0] for b in bounds]), np.array([b[1] for b in bounds])
+        radius = np.linalg.norm(hi - lo, axis=1) / 2
+        distance = np.linalg.norm((lo + hi) / 2 - self.main.pov.pos, axis=1)
+        with np.errstate(divide='ignore'):
+            pixels = np.where(distance > radius, radius / distance, np.inf) * self.main.pov.projection_matrix[1, 1] * size[1]
+        return [select_level(obj.lod_level, s, obj.mesh.lod_sizes) for obj, s in zip(objects, pixels.tolist())]
+
+    @staticmethod
+    def visible_objects(objects: list, planes):
+        """renvoie les objets dont la boîte englobante monde intersecte le frustum"""
+        if not objects:
+            return []
+        bounds = [obj.world_bounds() for obj in objects]
+        outside, _ = classify_boxes(np.array([b[0] for b in bounds]), np.array([b[1] for b in bounds]), planes)
+        return [obj for obj, out in zip(objects, outside.tolist()) if not out]
+
+    def mesh_batch(self, mesh, size: tuple=None):
+        """calcule les triangles visibles d'un mesh isolé"""
+        size = size or (self.main.screen_width, self.main.screen_height)
+        view_projection = self.main.pov.view_projection
+        return self.vertices_batch(mesh.world_vertices(), mesh.indexes, mesh.triangle_colors, view_projection, size, mesh.lod_faces[0])
+
+    def vertices_batch(self, V_h, indexes, colors, matrix, size: tuple, faces=None):
+        """calcule en une passe vectorisée les triangles visibles d'un ensemble de vertexs
+        faces : normales et centres monde des triangles (T, 6) pour l'éclairage (None : couleurs non éclairées)"""
+        # espace de découpage (modèle, vue et projection fusionnés en une seule multiplication)
+        with self.main.profiler.scope("scene.transform"):
+            V_clip = Mesh.clip_vertices(V_h, matrix)
+        return self.clip_batch(V_clip, indexes, colors, size, faces)
+
+    def instances_batch(self, instances, view_projection, planes, size: tuple, budget: int=1 << 18):
+        """calcule les triangles visibles des instances d'un mesh partagé
+        les instances hors du frustum sont écartées avant toute transformation de vertexs, les autres
+        sont transformées par paquets (au plus budget vertexs) en une seule multiplication par paquet"""
+        profiler = self.main.profiler
+        with profiler.scope("scene.instances"):
+            lo, hi = instances.world_bounds()
+            if self.frustum_culling:
+                outside, _ = classify_boxes(lo, hi, planes)
+                visible = np.flatnonzero(~outside)
+            else:
+                visible = np.arange(len(instances))
+        profiler.count("instances.visible", len(visible))
+
+        mesh = instances.mesh
+        V_h, n_v = mesh.vertices_homogeneous, len(mesh.vertices_homogeneous)
+        step = max(1, budget // max(n_v, 1))
+        batches = []
+        for start in range(0, len(visible), step):
+            chunk = visible[start:start + step]
+            with profiler.scope("scene.transform"):
+                # matrices modèle-vue-projection de chaque instance (K, 4, 4) puis vertexs (K * V, 4)
+                mvp = np.matmul(view_projection, instances.transforms[chunk])
+                V_clip = np.einsum('kij,vj->kvi', mvp, V_h).reshape(-1, 4)
+            indexes = (mesh.indexes[None] + (np.arange(len(chunk), dtype=np.int32) * n_v)[:, None, None]).reshape(-1, 3)
+            if instances.colored:
+                colors = np.repeat(instances.colors[chunk], len(mesh.indexes), axis=0)
+            else:
+                colors = np.tile(mesh.triangle_colors, (len(chunk), 1))
+            faces = transform_faces(mesh.lod_faces[0], instances.transforms[chunk]) if self.lighting.enabled else None
+            batches.append(self.clip_batch(V_clip, indexes, colors, size, faces))
+        return TriangleBatch.concatenate(batches)
+
+    def clip_batch(self, V_clip, indexes, colors, size: tuple, faces=None):
+        """découpe, élimine, éclaire et projette à l'écran les triangles de vertexs en espace de découpage"""
+        pov = self.main.pov
+        profiler = self.main.profiler
+        profiler.count("triangles.in", len(indexes))
+
+        with profiler.scope("scene.cull"):
+            # codes de région : triangles rejetés si leurs trois sommets sont du mauvais côté d'un même plan
+            codes = outcodes(V_clip, pov.near, pov.far)[indexes]
+            keep = (codes[:, 0] & codes[:, 1] & codes[:, 2]) == 0
+            indexes, codes = indexes[keep], codes[keep]
+
+            # triangles en espace de découpage (T, 3, 4)
+            triangles_clip = V_clip[indexes]
+
+            # back-face culling (valable avant découpage, même pour w négatif)
+            front = self.bf_culling_clip(triangles_clip)
+            indexes, codes, triangles_clip = indexes[front], codes[front], triangles_clip[front]
+            colors = colors[keep][front]
+        profiler.count("triangles.frustum_culled", len(keep) - len(front))
+        profiler.count("triangles.backface_culled", len(front) - len(indexes))
+
+        # éclairage des seuls triangles conservés
+        if faces is not None and self.lighting.enabled:
+            with profiler.scope("scene.shade"):
+                colors = self.lighting.shade(colors, faces[np.flatnonzero(keep)[front]])
+
+        # triangles entièrement dans le frustum : vertexs écran partagés
+        with profiler.scope("scene.assemble"):
+            crossing = (codes[:, 0] | codes[:, 1] | codes[:, 2]) != 0
+            inside = ~crossing
+            with np.errstate(divide='ignore', invalid='ignore'): # vertexs derrière la caméra, jamais utilisés ici
+                V_screen = Mesh.screen_vertices(Mesh.ndc_vertices(V_clip), size)
+            triangles_screen = V_screen[indexes[inside]]
+            batches = [TriangleBatch(triangles_screen[..., :2], -triangles_clip[inside, :, 3].mean(axis=1), colors[inside], triangles_screen[..., 2])]
+
+        # triangles traversant un plan : découpage de Sutherland-Hodgman en espace homogène
+        if crossing.any():
+            with profiler.scope("scene.clip"):
+                clipped, source = clip_triangles(triangles_clip[crossing], pov.near, pov.far)
+                clipped_screen = Mesh.screen_vertices(Mesh.ndc_vertices(clipped.reshape(-1, 4)), size).reshape(-1, 3, 3)
+                batches.append(TriangleBatch(clipped_screen[..., :2], -clipped[:, :, 3].mean(axis=1), colors[crossing][source], clipped_screen[..., 2]))
+            profiler.count("triangles.clipped", crossing.sum())
+        return TriangleBatch.concatenate(batches)
+
+    def triangle_normale(self, triangle):
+        """renvoie la normale d'un triangle (ou d'un tableau de triangles (T, 3, 3))"""
+        triangle = np.asarray(triangle)
+        return np.cross(triangle[..., 1, :] - triangle[..., 0, :], triangle[..., 2, :] - triangle[..., 0, :])
     
-    def triangle_normale(self, triangle: list):
-        """renvoie la normale d'un triangle"""
-        return np.cross(triangle[1] - triangle[0], triangle[2] - triangle[0])
-    
-    def bf_culling(self, triangle: list, normale):
+    def bf_culling(self, triangle, normale):
         """vérifie la visibilité du triangle par black-face culling"""
-        visible = np.dot(normale, triangle[0]) > 0
+        triangle = np.asarray(triangle)
+        visible = np.einsum('...i,...i->...', normale, triangle[..., 0, :]) > 0
         return visible
+
+    @staticmethod
+    def bf_culling_clip(triangles_clip):
+        """back-face culling dans l'espace de découpage à partir du déterminant (x, y, w)"""
+        # det(x, y, w) = -(r² / aspect) * det(caméra) : la face est visible si le déterminant est négatif
+        xyw = triangles_clip[..., [0, 1, 3]]
+        det = np.einsum('...i,...i->...', xyw[..., 0, :], np.cross(xyw[..., 1, :], xyw[..., 2, :]))
+        return det < 0
+
+
+class TriangleBatch:
+    """lot de triangles écran stocké en tableaux contigus"""
+    __slots__ = ['screen', 'depth', 'colors', 'z']
+
+    def __init__(self, screen, depth, colors, z=None):
+        self.screen = np.asarray(screen, dtype=np.float32)   # coordonnées écran (T, 3, 2)
+        self.depth = np.asarray(depth, dtype=np.float32)     # profondeur moyenne (T,)
+        self.colors = np.asarray(colors, dtype=np.uint8)     # couleurs (T, 3)
+        self.z = np.zeros((len(self.depth), 3), dtype=np.float32) if z is None else np.asarray(z, dtype=np.float32) # profondeur ndc des sommets (T, 3)
+
+    def __len__(self):
+        return len(self.depth)
+
+    @classmethod
+    def empty(cls):
+        """renvoie un lot vide"""
+        return cls(np.empty((0, 3, 2)), np.empty(0), np.empty((0, 3)))
+
+    @classmethod
+    def concatenate(cls, batches: list):
+        """fusionne plusieurs lots en un seul"""
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+        return cls(np.concatenate([batch.screen for batch in batches]),
+                   np.concatenate([batch.depth for batch in batches]),
+                   np.concatenate([batch.colors for batch in batches]),
+                   np.concatenate([batch.z for batch in batches]))
+
+    def take(self, indices):
+        """renvoie le sous-lot des triangles d'indices donnés"""
+        return TriangleBatch(self.screen[indices], self.depth[indices], self.colors[indices], self.z[indices])
+
+    def to_list(self):
+        """convertit le lot en liste de triangles [p0, p1, p2, profondeur, couleur]"""
+        return [[p0, p1, p2, depth, tuple(color)]
+                for (p0, p1, p2), depth, color in zip(self.screen.tolist(), self.depth.tolist(), self.colors.tolist())]
     
 
 class Mesh:
     """Ensemble de triangles formant un objet"""
-    def __init__(self, vertices: list, indexes : list, colors=(255, 0, 0)):
-        self.vertices = np.array(vertices, dtype=np.float32) # points du mesh
+    def __init__(self, vertices: list, indexes : list, colors=(255, 0, 0), lods: list=()):
+        self.vertices = np.asarray(vertices, dtype=np.float32) # points du mesh
         self.vertices_homogeneous = np.hstack([self.vertices, np.ones((self.vertices.shape[0], 1), dtype=np.float32)]) # ajoute une colonne de 1
-        self.indexes = np.array(indexes, dtype=np.int32) # indexes des points formant des triangles
+        self.indexes = np.asarray(indexes, dtype=np.int32) # indexes des points formant des triangles
         self.colors = colors
         self.unicolor = isinstance(colors, tuple)
+        self.triangle_colors = self.build_triangle_colors() # couleur de chaque triangle (T, 3)
+
+        # niveaux de détail (0 : mesh complet), chaque triangle simplifié garde la couleur de son triangle d'origine
+        self.lod_indexes = [self.indexes] + [np.asarray(indexes, dtype=np.int32) for indexes, _ in lods]
+        self.lod_colors = [self.triangle_colors] + [self.triangle_colors[faces] for _, faces in lods]
+        self.lod_sizes = LOD_SIZES[:len(lods)] # tailles projetées (pixels) de passage aux niveaux suivants
+
+        # normales et centres des triangles de chaque niveau dans le repère local (éclairage), calculés une fois
+        self.lod_faces = [face_data(self.vertices, indexes) for indexes in self.lod_indexes]
+
+        # boîte englobante dans le repère local
+        self.bounds_min = self.vertices.min(axis=0) if len(self.vertices) else np.zeros(3, dtype=np.float32)
+        self.bounds_max = self.vertices.max(axis=0) if len(self.vertices) else np.zeros(3, dtype=np.float32)
     
     def get_color(self, i: int):
         """renvoie la couleur du triangle ou de l'objet"""
         if self.unicolor:
             return self.colors
         return self.colors[i]
+
+    def build_triangle_colors(self):
+        """renvoie le tableau des couleurs de chaque triangle"""
+        if self.unicolor:
+            return np.tile(np.array(self.colors, dtype=np.uint8), (len(self.indexes), 1))
+        return np.array(self.colors, dtype=np.uint8).reshape(-1, 3)
     
     def world_vertices(self):
         """renvoie les vertexs dans l'espace monde"""
         # reshape vers (N, 4)
         return self.vertices_homogeneous
     
-    def camera_vertices(self, V_h,  view_matrix):
+    @staticmethod
+    def camera_vertices(V_h,  view_matrix):
         """renvoie les vertexs dans l'espace relatif à la caméra"""
         # transformation dans le repère de la caméra
         return V_h @ view_matrix.T
     
-    def clip_vertices(self, V_camera, projection_matrix):
+    @staticmethod
+    def clip_vertices(V_camera, projection_matrix):
         """renvoie les vertexs dans l'espace de découpage"""
         # transformation dans l'espace de découpage
         return V_camera @ projection_matrix.T
     
-    def clip_mask(self, V_clip, margin: float=0.3, near_margin: float=0.35):
-        """renvoie le masque de présence dans le frustum"""
-        w = V_clip[:, 3]
-        frustum = ((V_clip[:,0] >= -(w+margin)) &
-                (V_clip[:,0] <=  (w+margin)) &
-                (V_clip[:,1] >= -(w+margin)) &
-                (V_clip[:,1] <=  (w+margin)) &
-                (V_clip[:,2] >= -(w+margin)) &
-                (V_clip[:,2] <=  (w+margin)))
-        
-        crossing = (V_clip[:, 2] < -near_margin)
-        return frustum, crossing
-    
-    def ndc_vertices(self, V_clip):
+    @staticmethod
+    def ndc_vertices(V_clip):
         """renvoie les vertexs dans l'espace ndc [-1; 1]"""
         # division perspective
         return V_clip[:, :3] / V_clip[:, 3:4]
     
-    def screen_vertices(self, V_ndc, size: tuple):
+    @staticmethod
+    def screen_vertices(V_ndc, size: tuple):
         """renvoie les vertexs en pixels"""
         V_screen = np.empty_like(V_ndc) # crée une matrice vide (N, 4)
 
@@ -151,81 +394,152 @@ class Mesh:
 class Object:
     """Objet 3D importé, avec position, rotation et échelle"""
     
-    def __init__(self, vertices: np.ndarray, indexes: np.ndarray):
+    def __init__(self, vertices: np.ndarray, indexes: np.ndarray, colors=(255, 0, 0), lods: list=()):
         self.vertices = vertices           # vertexs dans le repère local
         self.indexes = indexes             # indices des triangles
-        self.mesh = Mesh(vertices, indexes)
+        self.mesh = Mesh(vertices, indexes, colors=colors, lods=lods)
+        self.lod_level = 0                 # niveau de détail affiché
+
+        # cache des vertexs dans l'espace monde (recalculé uniquement si la transformation change)
+        self.world_version = -1            # version de la transformation du cache
+        self.world_vertices_cache = np.empty_like(self.mesh.vertices_homogeneous)
+        self.bounds_version = -1           # version de la transformation de la boîte englobante monde
+        self.world_bounds_cache = None
+
+        # Transformations : noeud d'un graphe de scène, propre à l'objet jusqu'à son ajout dans une scène
+        self.graph = SceneGraph(1, movable=True)
+        self.node = self.graph.add()
+        self.parent = None
+        self.children = []
+
+    def __getstate__(self):
+        """copie transmise à un autre processus : sans le graphe de scène, la hiérarchie ni les caches monde"""
+        state = self.__dict__.copy()
+        del state["graph"], state["parent"], state["children"], state["world_vertices_cache"], state["world_bounds_cache"]
+        return state
+
+    def __setstate__(self, state):
+        """le noeud désigne le même indice dans la copie du graphe de scène du processus qui reçoit l'objet
+        (graph est affecté par ce processus avant l'ajout à sa scène)"""
+        self.__dict__.update(state)
+        self.graph, self.parent, self.children = None, None, []
+        self.world_version = self.bounds_version = -1
+        self.world_vertices_cache = np.empty_like(self.mesh.vertices_homogeneous)
+        self.world_bounds_cache = None
+
+    @property
+    def position(self):
+        return self.graph.positions[self.node]
+
+    @property
+    def rotation(self):
+        """rotation en degrés [pitch, yaw, roll]"""
+        return self.graph.rotations[self.node]
+
+    @property
+    def scale(self):
+        return self.graph.scales[self.node]
 
-        # Transformations
-        self.position = np.array([0, 0, 0], dtype=np.float32)
-        self.rotation = np.array([0, 0, 0], dtype=np.float32)  # rotation en degrés [pitch, yaw, roll]
-        self.scale = np.array([1, 1, 1], dtype=np.float32)
+    @property
+    def transform_matrix(self):
+        """matrice de transformation monde (recalculée par le graphe si un noeud a été modifié)"""
+        self.graph.update()
+        return self.graph.world[self.node]
 
-        # Matrice de transformation locale
-        self.transform_matrix = np.eye(4, dtype=np.float32)
-        self.update_transform_matrix()
+    @property
+    def transform_version(self):
+        """incrémenté à chaque modification de la matrice monde (y compris par un parent)"""
+        self.graph.update()
+        return int(self.graph.versions[self.node])
 
     def update_transform_matrix(self):
-        """Met à jour la matrice de transformation locale"""
-        # Rotation en radians
-        rx, ry, rz = np.radians(self.rotation)
-
-        # Matrices de rotation
-        Rx = np.array([
-            [1, 0, 0, 0],
-            [0, np.cos(rx), -np.sin(rx), 0],
-            [0, np.sin(rx), np.cos(rx), 0],
-            [0, 0, 0, 1]
-        ], dtype=np.float32)
-
-        Ry = np.array([
-            [np.cos(ry), 0, np.sin(ry), 0],
-            [0, 1, 0, 0],
-            [-np.sin(ry), 0, np.cos(ry), 0],
-            [0, 0, 0, 1]
-        ], dtype=np.float32)
-
-        Rz = np.array([
-            [np.cos(rz), -np.sin(rz), 0, 0],
-            [np.sin(rz), np.cos(rz), 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1]
-        ], dtype=np.float32)
-
-        # Matrice d'échelle
-        S = np.diag([*self.scale, 1])
-
-        # Matrice de translation
-        T = np.eye(4, dtype=np.float32)
-        T[:3, 3] = self.position
-
-        # Composition finale : T * Rz * Ry * Rx * S
-        self.transform_matrix = T @ Rz @ Ry @ Rx @ S
+        """marque la transformation comme modifiée (après une modification directe de position, rotation ou scale)
+        la matrice est recalculée au prochain accès, en une passe pour tous les objets modifiés"""
+        self.graph.mark(self.node)
 
     def set_position(self, pos):
-        self.position[:] = pos
-        self.update_transform_matrix()
+        self.graph.set_position(self.node, pos)
 
     def set_rotation(self, rot):
-        self.rotation[:] = rot
-        self.update_transform_matrix()
+        self.graph.set_rotation(self.node, rot)
 
     def set_scale(self, scale):
-        self.scale[:] = scale
-        self.update_transform_matrix()
+        self.graph.set_scale(self.node, scale)
+
+    def set_parent(self, parent):
+        """rattache l'objet à un parent (None : aucun), sa transformation devient relative à celle du parent
+        un objet hors scène rejoint le graphe de son parent avec ses descendants"""
+        if parent is not None and parent.graph is not self.graph:
+            if not self.graph.movable:
+                raise ValueError("objet déjà dans une scène : son parent doit appartenir au même graphe de scène")
+            self.move_to(parent.graph)
+        self.graph.set_parent(self.node, -1 if parent is None else parent.node)
+        if self.parent is not None:
+            self.parent.children.remove(self)
+        self.parent = parent
+        if parent is not None:
+            parent.children.append(self)
+
+    def attach(self, graph):
+        """place l'objet et toute sa hiérarchie dans le graphe de scène d'un environnement"""
+        if self.graph is graph:
+            return
+        if not self.graph.movable:
+            raise ValueError("objet déjà ajouté à une autre scène")
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        root.move_to(graph)
+
+    def move_to(self, graph, parent: int=-1):
+        """recopie le noeud de l'objet et ceux de ses descendants dans un autre graphe de scène"""
+        old, node = self.graph, self.node
+        self.graph = graph
+        self.node = graph.add(old.positions[node], old.rotations[node], old.scales[node], parent)
+        self.world_version = self.bounds_version = -1 # versions propres au nouveau noeud
+        for child in self.children:
+            child.move_to(graph, self.node)
 
     def get_world_vertices(self):
         """Retourne les vertexs transformés dans le monde (homogènes)"""
-        # Ajouter la coordonnée homogène
-        V_h = np.hstack([self.vertices, np.ones((self.vertices.shape[0], 1), dtype=np.float32)])
-        # Appliquer la transformation
-        return V_h @ self.transform_matrix.T
-
-
-class Cube:
+        if self.world_version != self.transform_version:
+            # Appliquer la transformation dans le cache préalloué
+            np.matmul(self.mesh.vertices_homogeneous, self.transform_matrix.T, out=self.world_vertices_cache)
+            self.world_version = self.transform_version
+        return self.world_vertices_cache
+
+    def world_faces(self, level: int=0):
+        """renvoie les normales et centres monde des triangles du niveau de détail donné (T, 6)"""
+        return transform_faces(self.mesh.lod_faces[level], self.transform_matrix)
+
+    def world_bounds(self):
+        """renvoie la boîte englobante (min, max) dans le monde, issue des 8 coins de la boîte locale transformés"""
+        if self.bounds_version != self.transform_version:
+            lo, hi = self.mesh.bounds_min, self.mesh.bounds_max
+            corners = np.array([[x, y, z, 1] for x in (lo[0], hi[0]) for y in (lo[1], hi[1]) for z in (lo[2], hi[2])], dtype=np.float32)
+            corners = corners @ self.transform_matrix.T
+            self.world_bounds_cache = (corners[:, :3].min(axis=0), corners[:, :3].max(axis=0))
+            self.bounds_version = self.transform_version
+        return self.world_bounds_cache
+
+
+class Cube(Object):
     """forme géométrique cubique de l'espace"""
     def __init__(self, pos: list, size: float, color=(255, 0, 0)):
         self.color = self.get_colors(color)
+        self.vertices, self.indexes = self.geometry(pos, size)
+
+        # mesh et transformations
+        super().__init__(self.vertices, self.indexes, colors=self.color)
+
+    @classmethod
+    def create_mesh(cls, pos: list, size: float, color=(255, 0, 0)):
+        """renvoie le seul mesh d'un cube (sans objet ni noeud du graphe de scène), pour l'instanciation"""
+        return Mesh(*cls.geometry(pos, size), colors=cls.get_colors(color))
+
+    @staticmethod
+    def geometry(pos: list, size: float):
+        """renvoie les sommets et triangles (indices) d'un cube"""
         half = size / 2
 
         # coin d'origine et opposé
@@ -234,7 +548,7 @@ class Cube:
         z0, z1 = pos[2] + half,pos[2] - half
 
         # 8 sommets
-        self.vertices = [
+        vertices = [
             [x0, y0, z0],   # gauche bas devant
             [x1, y0, z0],   # droite bas devant
             [x1, y0, z1],   # droite bas derrière
@@ -246,7 +560,7 @@ class Cube:
         ]
 
         # 12 triangles (indices)
-        self.indexes = [
+        indexes = [
             [4,1,0], [4,5,1], # face avant (z0)
             [6,3,2], [6,7,3], # face arrière (z1)
             [7,0,3], [7,4,0], # face gauche (x0)
@@ -254,11 +568,10 @@ class Cube:
             [0,2,3], [0,1,2], # face basse (y0)
             [7,5,4], [7,6,5], # face haute (y1)
         ]
+        return vertices, indexes
 
-        # mesh
-        self.mesh = Mesh(self.vertices, self.indexes, colors=self.color)
-
-    def get_colors(self, color):
+    @staticmethod
+    def get_colors(color):
         if isinstance(color, tuple):
             return color
         elif len(color) == 2:
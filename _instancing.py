@@ -0,0 +1,73 @@
+import numpy as np
+from _scene_buffer import SceneBuffer
+
+
+class InstancedMesh:
+    """mesh partagé dessiné à plusieurs positions : une matrice de transformation (et une couleur) par instance
+    la mémoire occupée croît avec le nombre d'instances, pas avec instances x vertexs"""
+    def __init__(self, mesh, colored: bool=False, capacity: int=16):
+        self.mesh = mesh # topologie et vertexs locaux partagés par toutes les instances
+        self.colored = colored # une couleur par instance (sinon les couleurs du mesh)
+
+        # stockage avec capacité (croissance par doublement)
+        self.transforms_data = np.empty((capacity, 4, 4), dtype=np.float32)
+        self.colors_data = np.empty((capacity, 3), dtype=np.uint8)
+        self.count = 0
+
+        # boîtes englobantes monde des instances (recalculées quand une transformation change)
+        self.version = 0
+        self.bounds_version = -1
+        self.bounds_cache = None
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def transforms(self):
+        """matrices de transformation des instances (N, 4, 4)"""
+        return self.transforms_data[:self.count]
+
+    @property
+    def colors(self):
+        """couleurs des instances (N, 3)"""
+        return self.colors_data[:self.count]
+
+    def add(self, transform, color=(255, 255, 255)):
+        """ajoute une instance et renvoie son indice"""
+        return self.add_many(np.asarray(transform)[None], [color])[0]
+
+    def add_many(self, transforms, colors=None):
+        """ajoute plusieurs instances (N, 4, 4) et renvoie leurs indices"""
+        transforms = np.asarray(transforms, dtype=np.float32).reshape(-1, 4, 4)
+        start, end = self.count, self.count + len(transforms)
+        self.transforms_data = SceneBuffer.reserve(self.transforms_data, end)
+        self.colors_data = SceneBuffer.reserve(self.colors_data, end)
+        self.transforms_data[start:end] = transforms
+        self.colors_data[start:end] = (255, 255, 255) if colors is None else colors
+        self.count = end
+        self.version += 1
+        return np.arange(start, end)
+
+    def set_transform(self, index, transform):
+        """remplace la transformation d'une ou plusieurs instances"""
+        self.transforms_data[:self.count][index] = transform
+        self.version += 1
+
+    def world_bounds(self):
+        """renvoie les boîtes englobantes (min (N, 3), max (N, 3)) des instances dans le monde
+        (8 coins de la boîte locale du mesh transformés par chaque instance en une seule passe)"""
+        if self.bounds_version != self.version:
+            lo, hi = self.mesh.bounds_min, self.mesh.bounds_max
+            corners = np.array([[x, y, z, 1] for x in (lo[0], hi[0]) for y in (lo[1], hi[1]) for z in (lo[2], hi[2])], dtype=np.float32)
+            world = np.einsum('nij,cj->nci', self.transforms, corners)[..., :3]
+            self.bounds_cache = (world.min(axis=1), world.max(axis=1))
+            self.bounds_version = self.version
+        return self.bounds_cache
+
+
+def translation(position):
+    """renvoie la matrice de translation (4, 4)"""
+    matrix = np.eye(4, dtype=np.float32)
+    matrix[:3, 3] = position
+    return matrix
+
@@ -0,0 +1,122 @@
+import numpy as np
+
+
+class DirectionalLight:
+    """lumière à l'infini (soleil) : même direction pour tous les triangles"""
+    def __init__(self, direction=(-0.4, -1.0, -0.6), color=(255, 255, 255), intensity: float=1.0):
+        self.direction = None # sens de propagation de la lumière (unitaire)
+        self.color = None
+        self.intensity = intensity
+        self.set(direction=direction, color=color)
+
+    def set(self, direction=None, color=None, intensity: float=None):
+        """modifie les paramètres donnés (passer par Lighting.update_light pour redessiner l'écran)"""
+        if direction is not None:
+            direction = np.asarray(direction, dtype=np.float32)
+            self.direction = direction / np.linalg.norm(direction)
+        if color is not None:
+            self.color = np.asarray(color, dtype=np.float32)
+        if intensity is not None:
+            self.intensity = intensity
+
+
+class PointLight:
+    """lumière ponctuelle : direction propre à chaque triangle, atténuée avec la distance"""
+    def __init__(self, position, color=(255, 255, 255), intensity: float=1.0, radius: float=10.0):
+        self.position = np.asarray(position, dtype=np.float32)
+        self.color = np.asarray(color, dtype=np.float32)
+        self.intensity = intensity
+        self.radius = radius # distance à laquelle l'éclairement est divisé par deux
+
+    def set(self, position=None, color=None, intensity: float=None, radius: float=None):
+        """modifie les paramètres donnés (passer par Lighting.update_light pour redessiner l'écran)"""
+        if position is not None:
+            self.position = np.asarray(position, dtype=np.float32)
+        if color is not None:
+            self.color = np.asarray(color, dtype=np.float32)
+        if intensity is not None:
+            self.intensity = intensity
+        if radius is not None:
+            self.radius = radius
+
+
+class Lighting:
+    """éclairage diffus de Lambert par triangle (flat shading) : lumière ambiante + somme des lumières"""
+    def __init__(self, ambient: float=0.3, lights: list=None, enabled: bool=True):
+        self.ambient = ambient
+        self.lights = [DirectionalLight()] if lights is None else list(lights)
+        self.enabled = enabled
+        self.version = 0 # incrémenté à chaque modification de l'éclairage (redessin de l'écran)
+
+    def add(self, light):
+        """ajoute une lumière et la renvoie"""
+        self.lights.append(light)
+        self.version += 1
+        return light
+
+    def remove(self, light):
+        """retire une lumière"""
+        self.lights.remove(light)
+        self.version += 1
+
+    def set_ambient(self, ambient: float):
+        """change la lumière ambiante"""
+        self.ambient = ambient
+        self.version += 1
+
+    def update_light(self, light, **parameters):
+        """modifie une lumière de la scène (direction, position, color, intensity, radius selon son type)"""
+        light.set(**parameters)
+        self.version += 1
+
+    @property
+    def has_point_lights(self):
+        """indique si les centres des triangles sont nécessaires"""
+        return any(isinstance(light, PointLight) for light in self.lights)
+
+    def shade(self, colors, faces):
+        """renvoie les couleurs éclairées (T, 3) uint8
+        colors : couleurs de base (T, 3), faces : normales (non unitaires) et centres monde (T, 6)"""
+        normals = faces[:, :3]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            normals = normals / np.sqrt(np.einsum('ij,ij->i', normals, normals))[:, None]
+        intensity = np.full((len(faces), 3), self.ambient, dtype=np.float32)
+
+        # lumières directionnelles : un produit matriciel pour toutes les lumières (T, L) @ (L, 3)
+        directional = [light for light in self.lights if isinstance(light, DirectionalLight)]
+        if directional:
+            directions = np.array([-light.direction for light in directional], dtype=np.float32)
+            weights = np.array([light.color * (light.intensity / 255) for light in directional], dtype=np.float32)
+            intensity += np.maximum(normals @ directions.T, 0) @ weights
+
+        # lumières ponctuelles : vecteurs triangle -> lumière (T, L, 3)
+        points = [light for light in self.lights if isinstance(light, PointLight)]
+        if points:
+            positions = np.array([light.position for light in points], dtype=np.float32)
+            weights = np.array([light.color * (light.intensity / 255) for light in points], dtype=np.float32)
+            radius = np.array([light.radius for light in points], dtype=np.float32)
+            to_light = positions[None] - faces[:, None, 3:]
+            distance = np.sqrt(np.einsum('tli,tli->tl', to_light, to_light))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                lambert = np.maximum(np.einsum('ti,tli->tl', normals, to_light) / distance, 0)
+            intensity += (lambert / (1 + (distance / radius) ** 2)) @ weights
+
+        np.nan_to_num(intensity, copy=False) # triangles dégénérés : ambiante seule
+        return np.minimum(colors * intensity, 255).astype(np.uint8)
+
+
+def face_data(vertices, indexes):
+    """renvoie les normales sortantes (non unitaires) et les centres des triangles (T, 6) dans le repère des vertexs"""
+    V = np.asarray(vertices, dtype=np.float32)
+    p0, p1, p2 = V[indexes[:, 0]], V[indexes[:, 1]], V[indexes[:, 2]]
+    return np.hstack([np.cross(p2 - p0, p1 - p0), (p0 + p1 + p2) / 3]).astype(np.float32)
+
+
+def transform_faces(faces, matrix):
+    """transforme des données de triangles (T, 6) par une matrice modèle (4, 4) ou des matrices (K, 4, 4) -> (K * T, 6)
+    (normales transformées par l'inverse transposée de la partie linéaire)"""
+    linear = matrix[..., :3, :3]
+    normal_matrix = np.swapaxes(np.linalg.inv(linear), -1, -2)
+    normals = np.einsum('...ij,tj->...ti', normal_matrix, faces[:, :3])
+    centers = np.einsum('...ij,tj->...ti', linear, faces[:, 3:]) + matrix[..., None, :3, 3]
+    return np.concatenate([normals, centers], axis=-1).reshape(-1, 6).astype(np.float32, copy=False)
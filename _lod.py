@@ -0,0 +1,174 @@
+import numpy as np
+from _mesh_cache import EXTENSION, load_mesh_cache, save_mesh_cache
+
+# niveaux de détail : chaque niveau garde une fraction des triangles du mesh d'origine
+LOD_RATIOS = (0.5, 0.25, 0.125)
+LOD_SIZES = (480, 240, 120) # taille projetée (pixels) sous laquelle le niveau 1, 2, 3... est utilisé
+LOD_HYSTERESIS = 0.15 # marge relative autour des seuils (évite les changements de niveau à chaque frame)
+BOUNDARY_WEIGHT = 100.0 # poids des plans de contrainte des arêtes de bord
+
+
+def lod_path(source: str):
+    """renvoie le chemin du fichier des niveaux de détail associé à un fichier source"""
+    return source + ".lod" + EXTENSION
+
+
+def load_lods(source: str, vertices, indexes, ratios: tuple=LOD_RATIOS, use_cache: bool=True):
+    """renvoie les niveaux de détail [(indexes, faces d'origine), ...] d'un mesh, depuis le disque si possible
+    la simplification n'est calculée qu'une fois puis enregistrée à côté du fichier source"""
+    if use_cache:
+        lods = cached_lods(source, ratios)
+        if lods is not None:
+            return lods
+
+    lods = build_lods(vertices, indexes, ratios)
+    path = lod_path(source)
+    if use_cache:
+        arrays = {"ratios": np.array(ratios, dtype=np.float32)}
+        for k, (lod_indexes, faces) in enumerate(lods, start=1):
+            arrays[f"indexes{k}"] = lod_indexes
+            arrays[f"faces{k}"] = faces
+        save_mesh_cache(source, arrays, path)
+    return lods
+
+
+def cached_lods(source: str, ratios: tuple=LOD_RATIOS):
+    """renvoie les niveaux de détail enregistrés sur le disque (projetés en mémoire), None s'ils sont absents ou périmés"""
+    cache = load_mesh_cache(source, lod_path(source))
+    if cache is None or not np.array_equal(cache.get("ratios", ()), np.array(ratios, dtype=np.float32)):
+        return None
+    return [(cache[f"indexes{k}"], cache[f"faces{k}"]) for k in range(1, len(ratios) + 1)]
+
+
+def build_lods(vertices, indexes, ratios: tuple=LOD_RATIOS):
+    """simplifie un mesh par contraction d'arêtes guidée par les quadriques d'erreur (QEM)
+
+    chaque contraction fusionne un sommet dans l'autre extrémité de l'arête : les sommets d'un niveau
+    sont un sous-ensemble de ceux d'origine, seuls les indexes changent (tampon de vertexs partagé)
+    et chaque triangle restant provient d'un triangle d'origine (faces), dont il garde la couleur
+    renvoie [(indexes (T, 3) int32, faces (T,) int32), ...] pour chaque ratio (décroissants)"""
+    V = np.asarray(vertices, dtype=np.float64)[:, :3]
+    F = np.asarray(indexes, dtype=np.int64).reshape(-1, 3)
+    faces = np.arange(len(F))
+    n_vertices = len(V)
+    Q = vertex_quadrics(V, F)
+    H = np.hstack([V, np.ones((n_vertices, 1))]) # sommets homogènes
+    rejected = np.empty(0, dtype=np.int64) # arêtes dont la contraction retourne un triangle (écartées ensuite)
+
+    lods = []
+    for ratio in ratios:
+        target = int(len(indexes) * ratio)
+        while len(F) > target:
+            # arêtes uniques et coût de contraction dans chaque sens (a -> b : a disparaît, b reste)
+            edges = np.sort(F[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+            edges = np.unique(edges[:, 0] * n_vertices + edges[:, 1])
+            a, b = edges // n_vertices, edges % n_vertices
+            Qe = Q[a] + Q[b]
+            cost_ab = np.einsum('ei,eij,ej->e', H[b], Qe, H[b])
+            cost_ba = np.einsum('ei,eij,ej->e', H[a], Qe, H[a])
+            remove = np.where(cost_ab <= cost_ba, a, b)
+            keep = np.where(cost_ab <= cost_ba, b, a)
+            cost = np.minimum(cost_ab, cost_ba)
+            cost[np.isin(edges, rejected)] = np.inf
+
+            # couplage : une arête est retenue si elle est la moins chère autour de ses deux sommets
+            # (les arêtes retenues sont disjointes), au plus ce qu'il faut pour atteindre la cible
+            rank = np.empty(len(edges), dtype=np.int64)
+            rank[np.argsort(cost, kind='stable')] = np.arange(len(edges))
+            best = np.full(n_vertices, len(edges), dtype=np.int64)
+            np.minimum.at(best, a, rank)
+            np.minimum.at(best, b, rank)
+            selected = np.flatnonzero((rank == best[a]) & (rank == best[b]))
+            selected = selected[np.isfinite(cost[selected])]
+            selected = selected[np.argsort(rank[selected])][:max(1, (len(F) - target) // 2)]
+            if not len(selected):
+                break
+
+            mapping, F_new = collapse(V, F, remove[selected], keep[selected])
+            applied = mapping[remove[selected]] == keep[selected] if mapping is not None else np.zeros(len(selected), bool)
+            rejected = np.union1d(rejected, edges[selected[~applied]])
+            if mapping is None:
+                continue
+            # quadriques fusionnées pour les seules contractions appliquées (collapse écarte les retournements)
+            np.add.at(Q, keep[selected[applied]], Q[remove[selected[applied]]])
+            F, faces = remove_degenerate(F_new, faces)
+        lods.append((F.astype(np.int32), faces.astype(np.int32)))
+    return lods
+
+
+def collapse(V, F, remove, keep, attempts: int=4):
+    """applique des contractions simultanées en écartant celles qui retournent un triangle
+    renvoie (correspondance des sommets, nouveaux indexes) ou (None, None) si aucune n'est possible"""
+    normals = np.cross(V[F[:, 1]] - V[F[:, 0]], V[F[:, 2]] - V[F[:, 0]])
+    for _ in range(attempts):
+        if not len(remove):
+            return None, None
+        mapping = np.arange(len(V))
+        mapping[remove] = keep
+        F_new = mapping[F]
+        changed = (F_new != F).any(axis=1)
+        degenerate = (F_new[:, 0] == F_new[:, 1]) | (F_new[:, 1] == F_new[:, 2]) | (F_new[:, 2] == F_new[:, 0])
+        moved = F_new[changed & ~degenerate]
+        new_normals = np.cross(V[moved[:, 1]] - V[moved[:, 0]], V[moved[:, 2]] - V[moved[:, 0]])
+        flipped = np.einsum('ij,ij->i', new_normals, normals[changed & ~degenerate]) <= 0
+        if not flipped.any():
+            return mapping, F_new
+        # rejet des contractions dont un sommet supprimé appartient à un triangle retourné
+        rejected = np.zeros(len(V), dtype=bool)
+        rejected[F[changed & ~degenerate][flipped].ravel()] = True
+        accepted = ~rejected[remove]
+        remove, keep = remove[accepted], keep[accepted]
+    return None, None
+
+
+def remove_degenerate(F, faces):
+    """supprime les triangles aplatis et les doublons (mêmes trois sommets)"""
+    valid = (F[:, 0] != F[:, 1]) & (F[:, 1] != F[:, 2]) & (F[:, 2] != F[:, 0])
+    F, faces = F[valid], faces[valid]
+    _, first = np.unique(np.sort(F, axis=1), axis=0, return_index=True)
+    first.sort()
+    return F[first], faces[first]
+
+
+def vertex_quadrics(V, F):
+    """renvoie la quadrique d'erreur (N, 4, 4) de chaque sommet
+    somme des plans de ses triangles pondérés par leur aire, plus des plans perpendiculaires aux arêtes de bord"""
+    Q = np.zeros((len(V), 4, 4))
+    p0, p1, p2 = V[F[:, 0]], V[F[:, 1]], V[F[:, 2]]
+    normals = np.cross(p1 - p0, p2 - p0)
+    lengths = np.linalg.norm(normals, axis=1)
+    valid = lengths > 0
+    unit = normals[valid] / lengths[valid, None]
+    planes = np.hstack([unit, -np.einsum('ij,ij->i', unit, p0[valid])[:, None]])
+    K = np.einsum('fi,fj->fij', planes, planes) * (lengths[valid] / 2)[:, None, None]
+    for k in range(3):
+        np.add.at(Q, F[valid, k], K)
+
+    # arêtes de bord (utilisées par un seul triangle) : plan contenant l'arête, perpendiculaire au triangle
+    starts, ends = F[valid].ravel(), F[valid][:, [1, 2, 0]].ravel()
+    keys = np.minimum(starts, ends) * len(V) + np.maximum(starts, ends)
+    _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    border = counts[inverse] == 1
+    if border.any():
+        edge = V[ends[border]] - V[starts[border]]
+        normal = np.cross(edge, np.repeat(unit, 3, axis=0)[border])
+        length = np.linalg.norm(normal, axis=1)
+        ok = length > 0
+        normal = normal[ok] / length[ok, None]
+        origin = V[starts[border]][ok]
+        planes = np.hstack([normal, -np.einsum('ij,ij->i', normal, origin)[:, None]])
+        weight = BOUNDARY_WEIGHT * np.einsum('ij,ij->i', edge[ok], edge[ok])
+        K = np.einsum('fi,fj->fij', planes, planes) * weight[:, None, None]
+        np.add.at(Q, starts[border][ok], K)
+        np.add.at(Q, ends[border][ok], K)
+    return Q
+
+
+def select_level(level: int, size: float, sizes: tuple=LOD_SIZES, hysteresis: float=LOD_HYSTERESIS):
+    """renvoie le niveau de détail à utiliser pour une taille projetée (pixels) à partir du niveau courant
+    un seuil n'est franchi que s'il est dépassé de la marge d'hystérésis"""
+    while level > 0 and size > sizes[level - 1] * (1 + hysteresis):
+        level -= 1
+    while level < len(sizes) and size < sizes[level] * (1 - hysteresis):
+        level += 1
+    return level
@@ -1,31 +1,34 @@
 import pygame
 import sys
 import os
+import time
 from _env import Environnement
 from _pov import Pov
 from _renderer import Renderer
+from _profiler import Profiler
+from _recorder import CameraRecorder, CameraReplay, EXTENSION
+from _pipeline import FramePipeline
 
 """à faire"""
 # couleurs
-# lambert light computing
 
 # _________________________- Main -_________________________
 class Main:
-    def __init__(self):
+    def __init__(self, default_scene: bool=True):
         """variables utiles"""
         self.running = True # état du logiciel
         self.clock = pygame.time.Clock() # clock pygame
         self.fps_max = 60 # limite de fps
+        self.idle_fps = None # limite de fps quand rien ne change à l'écran (None : fps_max)
+        self.idle = False # la dernière frame a réutilisé l'image précédente
         self.dt = 0 # delta time utilisé pour les animations
 
         """pygame"""
         pygame.init()
 
-        # écran virtuel
+        # écran virtuel (dimensions de référence, le rendu se fait dans Renderer.surface)
         self.screen_width = 1920
         self.screen_height = 1080
-        self.screen = pygame.Surface((self.screen_width, self.screen_height), pygame.SRCALPHA)
-        self.screen.fill((255, 255, 255))
 
         # écran intermédiaire (taille réelle mais sans bandes noires)
         self.screen_final_width = self.screen_width
@@ -55,47 +58,143 @@ class Main:
         self.mouse_out = False # curseur en dehors de l'écran
 
         """objets"""
-        self.env = Environnement(self)
+        self.profiler = Profiler() # temps par étape de la frame (F3 : overlay, F4 : trace)
+        self.env = Environnement(self, default_scene)
         self.pov = Pov(self)
         self.renderer = Renderer(self)
+        self.recorder = CameraRecorder(self.pov) # enregistrement de la trajectoire de la caméra (F5)
+
+        # redessin à la demande : état (caméra, scène, rendu, fenêtre) de la dernière image affichée
+        self.frame_state = None
+        self.redraw = True # force le prochain rendu (fenêtre exposée...)
+
+        # rendu en pipeline : géométrie calculée dans un processus séparé (None : rendu séquentiel)
+        self.pipeline = None
     
     def loop(self):
         """loop principal du logiciel"""
         while self.running:
-            self.dt = self.clock.tick(self.fps_max) / 1000 # limite de fps
+            self.dt = self.clock.tick(self.idle_fps if self.idle and self.idle_fps else self.fps_max) / 1000 # limite de fps
+            profiler = self.profiler
+            profiler.begin_frame()
             self.calc_screen_offsets() # adadptation des dimensions de l'écran
 
-            # souris
-            mouse_x, mouse_y = pygame.mouse.get_pos()
-            if not self.screen_x_offset <= mouse_x <= self.screen_resized_width - self.screen_x_offset or not self.screen_y_offset <= mouse_y <= self.screen_resized_height - self.screen_y_offset: # limite à l'écran
-                self.mouse_out = True
-            else:
-                self.mouse_out = False
-            self.mouse_x = (mouse_x - self.screen_x_offset) / (self.screen_final_width / self.screen_width) # conversion de la coordonée x
-            self.mouse_y = (mouse_y - self.screen_y_offset) / (self.screen_final_height / self.screen_height) # conversion de la coordonée y
+            with profiler.scope("inputs"):
+                # souris
+                mouse_x, mouse_y = pygame.mouse.get_pos()
+                if not self.screen_x_offset <= mouse_x <= self.screen_resized_width - self.screen_x_offset or not self.screen_y_offset <= mouse_y <= self.screen_resized_height - self.screen_y_offset: # limite à l'écran
+                    self.mouse_out = True
+                else:
+                    self.mouse_out = False
+                self.mouse_x = (mouse_x - self.screen_x_offset) / (self.screen_final_width / self.screen_width) # conversion de la coordonée x
+                self.mouse_y = (mouse_y - self.screen_y_offset) / (self.screen_final_height / self.screen_height) # conversion de la coordonée y
 
-            # vérification des entrées utilisateur
-            self.handle_inputs()
-            self.handle_pressed()
+                # vérification des entrées utilisateur
+                self.handle_inputs()
+                self.handle_pressed()
 
             # mouse look
-            mx, my = pygame.mouse.get_rel()
-            if mx != 0 or my != 0:
-                self.pov.rotate(mx * 0.04, my * 0.04)
+            with profiler.scope("pov"):
+                mx, my = pygame.mouse.get_rel()
+                if mx != 0 or my != 0:
+                    self.pov.rotate(mx * 0.04, my * 0.04)
+            self.recorder.record_frame(self.dt)
+
+            self.draw_frame()
+            profiler.end_frame()
+
+    def draw_frame(self):
+        """met à jour l'environnement, rend la scène et l'affiche
+        si ni la caméra, ni la scène, ni la fenêtre n'ont changé, l'image précédente est conservée"""
+        profiler = self.profiler
+        # mise à jour de l'environnement
+        with profiler.scope("env.update"):
+            self.env.update()
+        changed = self.redraw or self.get_frame_state() != self.frame_state
+        pipeline = self.pipeline
+        self.idle = not changed and not (pipeline is not None and pipeline.in_flight) # frames en cours à afficher
+        loading = self.env.progress() # progression des chargements en arrière-plan (None : aucun)
+        if self.idle:
+            if profiler.overlay or loading: # seuls les statistiques et les chargements changent : image précédente
+                self.blit_screen_resized()
+                if loading:
+                    self.draw_loading(*loading)
+                profiler.draw_overlay(self.screen_resized)
+                pygame.display.update()
+            return
 
-            # mise à jour de l'environnement
-            self.renderer.draw_scene()
+        with profiler.scope("render"):
+            if pipeline is None:
+                self.renderer.draw_scene()
+            else:
+                pipeline.render(submit=changed)
+        self.frame_state = self.get_frame_state() # après le rendu (la résolution dynamique peut changer)
+        self.redraw = False
 
-            # mise à jour de l'écran
+        # mise à jour de l'écran
+        with profiler.scope("blit"):
             self.blit_screen_resized()
+        if loading:
+            self.draw_loading(*loading)
+        profiler.draw_overlay(self.screen_resized)
+        with profiler.scope("display"):
             pygame.display.update()
 
+    def set_pipeline(self, depth: int):
+        """active le rendu en pipeline avec depth frames en cours de calcul au plus (0 : rendu séquentiel)"""
+        if self.pipeline is not None:
+            self.pipeline.close()
+            self.pipeline = None
+        if depth > 0:
+            self.pipeline = FramePipeline(self, depth)
+        self.redraw = True
+
+    def get_frame_state(self):
+        """renvoie l'état dont dépend l'image affichée"""
+        renderer = self.renderer
+        return (self.pov.version, self.env.state(), renderer.backend, renderer.size,
+                self.screen_resized.get_size(), self.fullscreen, self.profiler.overlay)
+
+    def replay(self, path: str, realtime: bool=False, trace: str=None):
+        """rejoue un enregistrement de caméra, une frame enregistrée par frame rendue, et renvoie les temps de frame (ms)
+        realtime : respecte la durée enregistrée de chaque frame, sinon rendu sans limite de fps
+        trace : fichier .json / .csv où écrire la trace du profiler"""
+        replay = CameraReplay(self.pov, path)
+
+        # scène complète avant la première frame (chargements en arrière-plan terminés)
+        while self.env.pending:
+            self.env.update()
+            time.sleep(0.01)
+
+        self.profiler.set_window(max(len(replay), self.profiler.window))
+        self.profiler.reset()
+        times = []
+        while not replay.done() and self.running:
+            start = time.perf_counter()
+            self.profiler.begin_frame()
+            for event in pygame.event.get(pygame.QUIT):
+                self.close_window()
+            self.dt = replay.apply()
+            self.draw_frame()
+            self.profiler.end_frame()
+            elapsed = time.perf_counter() - start
+            times.append(elapsed * 1000)
+            if realtime and self.dt > elapsed:
+                time.sleep(self.dt - elapsed)
+
+        if trace:
+            self.profiler.dump(trace)
+        return times
+
     def handle_inputs(self):
         """vérification des entrées utilisateur"""
         for event in pygame.event.get():
             if event.type == pygame.QUIT: # fermeture de la fenêtre
                 self.close_window()
             
+            elif event.type in (pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED):
+                self.redraw = True # contenu de la fenêtre à redessiner
+
             elif event.type == pygame.VIDEORESIZE:
                 # sauvegarde des dimensions fenêtrées
                 if not self.fullscreen:
@@ -108,24 +207,35 @@ class Main:
                 if event.key == pygame.K_F11:
                     self.toggle_fullscreen()
                     self.update_projection_matrix()
+
+                # profiler : overlay des temps par étape, écriture de la trace
+                elif event.key == pygame.K_F3:
+                    self.profiler.toggle_overlay()
+                elif event.key == pygame.K_F4:
+                    self.profiler.dump(time.strftime("frame_trace_%Y%m%d_%H%M%S.json"))
+
+                # enregistrement de la trajectoire de la caméra (début / fin et écriture)
+                elif event.key == pygame.K_F5:
+                    if self.recorder.recording:
+                        self.recorder.stop()
+                        self.recorder.save(time.strftime("camera_%Y%m%d_%H%M%S") + EXTENSION)
+                    else:
+                        self.recorder.start()
+
+                # éclairage de Lambert (activé / désactivé)
+                elif event.key == pygame.K_F6:
+                    self.env.lighting.enabled = not self.env.lighting.enabled
     
     def handle_pressed(self):
         keys = pygame.key.get_pressed() # clés pressées
 
-        # déplacement
+        # déplacement (touches cumulées en un seul déplacement par frame)
         speed = 3.0 * self.dt
-        if keys[pygame.K_z]:
-            self.pov.move([0,0, speed])
-        if keys[pygame.K_s]:
-            self.pov.move([0,0,-speed])
-        if keys[pygame.K_q]:
-            self.pov.move([-speed,0,0])
-        if keys[pygame.K_d]:
-            self.pov.move([speed,0,0])
-        if keys[pygame.K_SPACE]:
-            self.pov.move([0,speed,0])
-        if keys[pygame.K_a]:
-            self.pov.move([0,-speed,0])
+        dx = (keys[pygame.K_d] - keys[pygame.K_q]) * speed
+        dy = (keys[pygame.K_SPACE] - keys[pygame.K_a]) * speed
+        dz = (keys[pygame.K_z] - keys[pygame.K_s]) * speed
+        if dx or dy or dz:
+            self.pov.move([dx, dy, dz])
 
     def toggle_fullscreen(self):
         """bascule entre mode fenêtré et plein écran"""
@@ -168,11 +278,19 @@ class Main:
         self.screen_y_offset = (self.screen_resized_height - self.screen_final_height) // 2
 
     def blit_screen_resized(self):
-        """redimensionne l'écran virtuel sur l'écran réel"""
-        new_screen = pygame.transform.smoothscale(self.screen, (self.screen_final_width, self.screen_final_height))
+        """redimensionne la surface de rendu (résolution interne) sur l'écran réel en une seule passe"""
+        new_screen = pygame.transform.smoothscale(self.renderer.surface, (self.screen_final_width, self.screen_final_height))
         self.screen_resized.fill((0, 0, 0)) # pour les bandes noires
         self.screen_resized.blit(new_screen, (self.screen_x_offset, self.screen_y_offset))
 
+    def draw_loading(self, done: int, total: int):
+        """affiche la progression des chargements en arrière-plan (barre en bas de l'écran, par-dessus l'image)"""
+        width, height = self.screen_resized.get_size()
+        bar = pygame.Rect(width // 4, height - 40, width // 2, 20)
+        pygame.draw.rect(self.screen_resized, (255, 255, 255), bar, 2)
+        bar.width = int(bar.width * done / max(total, 1))
+        pygame.draw.rect(self.screen_resized, (255, 255, 255), bar)
+
     @staticmethod
     def get_path(relative_path, folder=False):
         """Obtention du chemin absolu des assets"""
@@ -185,10 +303,32 @@ class Main:
 
     def close_window(self):
         """fonction de fermeture du logiciel"""
+        self.env.data_manager.shutdown()
+        self.set_pipeline(0)
         pygame.display.quit()
         self.running = False
         sys.exit()
 
 # _________________________- Démarrage -_________________________
-main = Main()
-main.loop()
\ No newline at end of file
+if __name__ == "__main__": # protège les processus de chargement qui réimportent ce module
+    import argparse
+    parser = argparse.ArgumentParser(description="Environnement virtuel 3D")
+    parser.add_argument("--replay", help="rejoue un enregistrement de caméra (" + EXTENSION + ", touche F5 pour enregistrer)")
+    parser.add_argument("--realtime", action="store_true", help="rejoue à la vitesse enregistrée (sinon sans limite de fps)")
+    parser.add_argument("--trace", help="écrit la trace des temps de frame du rejeu (.json ou .csv)")
+    parser.add_argument("--idle-fps", type=int, help="limite de fps quand l'image ne change pas (économie d'énergie)")
+    parser.add_argument("--pipeline", type=int, default=0, help="rendu en pipeline : nombre de frames en cours de calcul (0 : désactivé)")
+    args = parser.parse_args()
+
+    main = Main()
+    main.idle_fps = args.idle_fps
+    main.set_pipeline(args.pipeline)
+    if args.replay:
+        times = main.replay(args.replay, realtime=args.realtime, trace=args.trace)
+        stats = main.profiler.stats().get("frame", {})
+        print(f"{len(times)} frames, {sum(times) / max(len(times), 1):.2f} ms en moyenne, "
+              + ", ".join(f"{key} {value:.2f} ms" for key, value in stats.items() if key != "mean"))
+        main.env.data_manager.shutdown()
+        main.set_pipeline(0)
+    else:
+        main.loop()
\ No newline at end of file
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import struct
+import numpy as np
+
+# format du cache binaire :
+# en-tête : magic, version, taille source, mtime source (ns), empreinte source, nombre de tableaux
+# puis pour chaque tableau : nom, dtype, dimensions, forme et position des données (alignées sur 64 octets)
+
+MAGIC = b"MSHC"
+VERSION = 1
+EXTENSION = ".meshcache"
+ALIGNMENT = 64
+
+HEADER = struct.Struct("<4sIQq32sI")        # magic, version, taille, mtime, empreinte, nombre de tableaux
+ARRAY_HEADER = struct.Struct("<16s8sI4QQ")  # nom, dtype, ndim, forme (4 max), position
+
+
+def cache_path(source: str):
+    """renvoie le chemin du cache associé à un fichier source"""
+    return source + EXTENSION
+
+
+def source_hash(source: str, block_size: int=1 << 20):
+    """renvoie l'empreinte blake2b du fichier source"""
+    h = hashlib.blake2b(digest_size=32)
+    with open(source, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.digest()
+
+
+def save_mesh_cache(source: str, arrays: dict, path: str=None):
+    """écrit les tableaux dans le cache binaire associé au fichier source"""
+    path = path or cache_path(source)
+    stat = os.stat(source)
+
+    # table des tableaux et positions des données
+    table = []
+    offset = HEADER.size + ARRAY_HEADER.size * len(arrays)
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        table.append((name, array, offset))
+        offset += array.nbytes
+
+    # écriture atomique (fichier temporaire puis remplacement)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, stat.st_size, stat.st_mtime_ns, source_hash(source), len(table)))
+            for name, array, position in table:
+                shape = tuple(array.shape) + (0,) * (4 - array.ndim)
+                f.write(ARRAY_HEADER.pack(name.encode(), array.dtype.str.encode(), array.ndim, *shape, position))
+            for _, array, position in table:
+                f.write(b"\0" * (position - f.tell()))
+                f.write(array.tobytes())
+        os.replace(tmp, path)
+    except OSError: # dossier en lecture seule : pas de cache
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+    return True
+
+
+def load_mesh_cache(source: str, path: str=None):
+    """renvoie les tableaux du cache (projetés en mémoire) ou None si le cache est absent ou périmé"""
+    path = path or cache_path(source)
+    try:
+        stat = os.stat(source)
+        with open(path, 'rb') as f:
+            magic, version, size, mtime, digest, count = HEADER.unpack(f.read(HEADER.size))
+            entries = [ARRAY_HEADER.unpack(f.read(ARRAY_HEADER.size)) for _ in range(count)]
+            length = os.fstat(f.fileno()).st_size
+    except (OSError, struct.error):
+        return None
+
+    # invalidation : format, taille puis date de modification (empreinte si seule la date diffère)
+    if magic != MAGIC or version != VERSION or size != stat.st_size:
+        return None
+
+    # table des tableaux : un cache tronqué ou corrompu est considéré comme périmé
+    table = []
+    try:
+        for name, dtype, ndim, *rest in entries:
+            shape, position = tuple(rest[:ndim]), rest[4]
+            dtype = np.dtype(dtype.rstrip(b"\0").decode())
+            if ndim > 4 or position + dtype.itemsize * int(np.prod(shape)) > length:
+                return None
+            table.append((name.rstrip(b"\0").decode(), dtype, shape, position))
+    except (TypeError, ValueError):
+        return None
+
+    if mtime != stat.st_mtime_ns:
+        if digest != source_hash(source):
+            return None
+        # contenu identique : date mise à jour dans l'en-tête (le fichier n'est plus haché aux démarrages suivants)
+        try:
+            with open(path, 'r+b') as f:
+                f.write(HEADER.pack(magic, version, size, stat.st_mtime_ns, digest, count))
+        except OSError: # cache en lecture seule : empreinte recalculée à chaque chargement
+            pass
+
+    arrays = {}
+    for name, dtype, shape, position in table:
+        if 0 in shape: # np.memmap refuse les tableaux vides
+            arrays[name] = np.empty(shape, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=position, shape=shape)
+    return arrays
@@ -0,0 +1,206 @@
+import multiprocessing
+import os
+import traceback
+from collections import deque
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from _env import Environnement, TriangleBatch
+from _pov import Pov
+from _profiler import Profiler
+
+
+class FramePipeline:
+    """rendu en pipeline : la géométrie de la frame N+1 est calculée dans un processus séparé pendant que
+    la frame N est rastérisée et affichée, le débit tend vers celui de l'étape la plus lente
+
+    à chaque frame, le processus reçoit un instantané de la caméra et des transformations (et les objets
+    ajoutés depuis la frame précédente), puis écrit les triangles écran dans un anneau de depth lots en
+    mémoire partagée ; l'image affichée a depth - 1 frames de retard sur la caméra"""
+    def __init__(self, main, depth: int=2):
+        self.main = main
+        self.depth = depth # nombre maximal de frames en cours de calcul
+        self.ring = [None] * depth # lots partagés (SharedBatch) reçus du processus de géométrie
+        self.free = deque(range(depth)) # emplacements de l'anneau disponibles
+        self.in_flight = deque() # frames soumises non reçues : (emplacement, taille de rendu)
+
+        # état déjà transmis au processus (seules les différences sont envoyées)
+        self.objects = 0 # nombre d'objets de la scène transmis
+        self.instances = [] # version transmise de chaque InstancedMesh
+        self.graph_version = -1
+
+        # "spawn" : le processus ne copie ni la fenêtre pygame ni les threads du processus principal
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1") # message d'accueil de pygame déjà affiché
+        context = multiprocessing.get_context("spawn")
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=geometry_worker, args=(child, (main.screen_width, main.screen_height)), daemon=True)
+        self.process.start()
+        child.close()
+
+    def render(self, submit: bool=True):
+        """soumet la géométrie de la frame courante puis rastérise la plus ancienne frame calculée
+        submit : faux si rien n'a changé, les frames encore en cours sont alors seulement vidées"""
+        if submit:
+            self.submit()
+        if self.in_flight and (len(self.in_flight) >= self.depth or not submit):
+            batch, size = self.receive()
+            self.main.renderer.draw_scene(batch, size)
+
+    def submit(self):
+        """envoie l'état de la frame courante au processus de géométrie"""
+        main, env = self.main, self.main.env
+        with main.profiler.scope("pipeline.submit"):
+            # objets et instances ajoutés depuis la dernière frame (listes en ajout seul)
+            dynamic = {id(obj) for obj in env.dynamic_objects}
+            objects = [(obj, id(obj) in dynamic) for obj in env.objects[self.objects:]]
+            instances = env.instances[len(self.instances):]
+            # instances déjà transmises dont les transformations ont changé
+            updates = [(i, inst.transforms, inst.colors) for i, inst in enumerate(env.instances[:len(self.instances)])
+                       if inst.version != self.instances[i]]
+            graph = env.graph.snapshot() if env.graph.version != self.graph_version else None
+            self.objects = len(env.objects)
+            self.instances = [inst.version for inst in env.instances]
+            self.graph_version = env.graph.version
+
+            slot, size = self.free.popleft(), main.renderer.size
+            settings = (env.lighting, env.frustum_culling, env.lod)
+            self.connection.send(("frame", slot, size, main.pov.snapshot(), graph, objects, instances, updates, settings))
+            self.in_flight.append((slot, size))
+
+    def receive(self):
+        """attend la plus ancienne frame soumise, renvoie son lot de triangles (en mémoire partagée) et sa taille de rendu"""
+        profiler = self.main.profiler
+        slot, size = self.in_flight.popleft()
+        with profiler.scope("pipeline.wait"):
+            message = self.connection.recv()
+        if message[0] == "error":
+            raise RuntimeError("processus de géométrie :\n" + message[1])
+        _, count, name, capacity, timings, counters = message
+
+        if name is not None: # lot agrandi par le processus de géométrie
+            if self.ring[slot] is not None:
+                self.ring[slot].close()
+            self.ring[slot] = SharedBatch(capacity, name)
+        self.free.append(slot) # réutilisable dès la frame suivante (la rastérisation est terminée d'ici là)
+
+        # temps et compteurs des étapes calculées par le processus
+        for key, ms in timings.items():
+            profiler.add_time(key, ms)
+        for key, value in counters.items():
+            profiler.count(key, value)
+        return self.ring[slot].batch(count), size
+
+    def close(self):
+        """arrête le processus de géométrie et libère l'anneau"""
+        try:
+            while self.in_flight: # lots créés mais pas encore rattachés
+                self.receive()
+            self.connection.send(("stop",))
+        except (EOFError, OSError, RuntimeError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.connection.close()
+        for shared in self.ring:
+            if shared is not None:
+                shared.close()
+        self.ring = [None] * self.depth
+
+
+class SharedBatch:
+    """lot de triangles de capacité fixe en mémoire partagée (un emplacement de l'anneau)
+    name : segment existant à rattacher (sinon un nouveau segment est créé)"""
+    def __init__(self, capacity: int, name: str=None):
+        self.capacity = capacity
+        if name is None:
+            self.block = shared_memory.SharedMemory(create=True, size=max(43 * capacity, 1))
+            resource_tracker.unregister(self.block._name, "shared_memory") # le processus principal en devient responsable
+        else:
+            self.block = shared_memory.SharedMemory(name=name)
+            self.block.unlink() # le segment disparaît dès que plus aucun processus ne le projette
+
+        # tableaux contigus : coordonnées écran, z des sommets, profondeur moyenne, couleurs (43 octets par triangle)
+        buffer = self.block.buf
+        self.screen = np.ndarray((capacity, 3, 2), dtype=np.float32, buffer=buffer)
+        self.z = np.ndarray((capacity, 3), dtype=np.float32, buffer=buffer, offset=24 * capacity)
+        self.depth = np.ndarray(capacity, dtype=np.float32, buffer=buffer, offset=36 * capacity)
+        self.colors = np.ndarray((capacity, 3), dtype=np.uint8, buffer=buffer, offset=40 * capacity)
+
+    @property
+    def name(self):
+        return self.block.name
+
+    def write(self, batch):
+        """copie un lot de triangles (au plus capacity)"""
+        n = len(batch)
+        self.screen[:n] = batch.screen
+        self.z[:n] = batch.z
+        self.depth[:n] = batch.depth
+        self.colors[:n] = batch.colors
+
+    def batch(self, count: int):
+        """renvoie les count premiers triangles (vues sans copie)"""
+        return TriangleBatch(self.screen[:count], self.depth[:count], self.colors[:count], self.z[:count])
+
+    def close(self):
+        """libère la projection du segment"""
+        self.screen = self.z = self.depth = self.colors = None
+        self.block.close()
+
+
+class GeometryWorker:
+    """copie de la scène dans le processus de géométrie (mêmes attributs que Main pour Environnement et Pov)"""
+    def __init__(self, screen_size: tuple):
+        self.screen_width, self.screen_height = screen_size
+        self.profiler = Profiler()
+        self.pov = Pov(self)
+        self.env = Environnement(self, default_scene=False)
+        self.ring = {} # lots partagés par emplacement
+
+    def frame(self, slot, size, camera, graph, objects, instances, updates, settings):
+        """met la copie de la scène à jour, calcule les triangles écran et les écrit dans l'emplacement slot"""
+        env, profiler = self.env, self.profiler
+        profiler.begin_frame()
+
+        # transformations avant les ajouts (vertexs monde des nouveaux objets statiques)
+        if graph is not None:
+            env.graph.restore(graph)
+        for obj, dynamic in objects:
+            obj.graph = env.graph # même indice de noeud que dans le graphe du processus principal
+            env.add(obj, dynamic=dynamic)
+        for inst in instances:
+            env.add_instances(inst)
+        for i, transforms, colors in updates:
+            inst = env.instances[i]
+            inst.transforms_data, inst.colors_data, inst.count = transforms, colors, len(transforms)
+            inst.version += 1
+        env.lighting, env.frustum_culling, env.lod = settings
+        self.pov.restore(camera)
+
+        batch = env.screen_batch(size)
+        with profiler.scope("pipeline.write"):
+            shared, name = self.ring.get(slot), None
+            if shared is None or shared.capacity < len(batch): # emplacement agrandi (marge de 25 %)
+                if shared is not None:
+                    shared.close()
+                shared = self.ring[slot] = SharedBatch(max(len(batch) + len(batch) // 4, 4096))
+                name = shared.name
+            shared.write(batch)
+        return "frame", len(batch), name, shared.capacity, profiler.timings, profiler.counters
+
+
+def geometry_worker(connection, screen_size: tuple):
+    """boucle du processus de géométrie : une frame par message reçu jusqu'au message "stop" """
+    worker = GeometryWorker(screen_size)
+    while True:
+        message = connection.recv()
+        if message[0] == "stop":
+            break
+        try:
+            connection.send(worker.frame(*message[1:]))
+        except Exception:
+            connection.send(("error", traceback.format_exc()))
+            break
+    for shared in worker.ring.values():
+        shared.close()
+    connection.close()
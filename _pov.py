@@ -23,12 +23,16 @@ class Pov:
         self.near = 0.01 # distance minimal d'affichage
         self.far = 1000.0 # distance maximale d'affichage
 
-        self.view_matrix = None # matrice relative à la caméra
-        self.projection_matrix = None # matrice de projection
+        """matrices (calculées à la demande et mises en cache)"""
+        self.view = None # matrice relative à la caméra
+        self.projection = None # matrice de projection
+        self.fused = None # produit projection x vue
+        self.view_dirty = True # matrice de vue à recalculer
+        self.projection_dirty = True # matrice de projection à recalculer
+        self.version = 0 # incrémenté à chaque changement de matrice (redessin de l'écran)
 
         """initialisation"""
-        self.update_view_matrix()
-        self.update_projection_matrix()
+        self.update_directions()
     
     @property
     def x(self):
@@ -46,28 +50,63 @@ class Pov:
         return self.pos[2]
     
     # ___________________________________________________________ Matrices ___________________________________________________________
+    @property
+    def view_matrix(self):
+        """matrice de vue, recalculée seulement après un changement de la caméra"""
+        if self.view_dirty:
+            self.view = self.calc_view_matrix()
+            self.view_dirty = False
+            self.fused = None
+        return self.view
+
+    @property
+    def projection_matrix(self):
+        """matrice de projection, recalculée seulement après un changement de fov ou de limites"""
+        if self.projection_dirty:
+            self.projection = self.calc_projection_matrix()
+            self.projection_dirty = False
+            self.fused = None
+        return self.projection
+
+    @property
+    def view_projection(self):
+        """matrice vue-projection fusionnée : une seule multiplication par vertex"""
+        view, projection = self.view_matrix, self.projection_matrix
+        if self.fused is None:
+            self.fused = projection @ view
+        return self.fused
+
     def update_view_matrix(self, dirs=True):
-        """actualisation de la matrice de vue"""
+        """invalide la matrice de vue (recalculée au prochain accès, plusieurs changements par frame n'en coûtent qu'un)"""
         if dirs: # calcul des vecteurs directionnels
             self.update_directions()
-        f = self.forward
-        r = self.right
-        u = self.up
-        p = self.pos
-        self.view_matrix = np.array(
-            [[  r[0],   r[1],   r[2],   -np.dot(r, p)], # axe x
-             [  u[0],   u[1],   u[2],   -np.dot(u, p)], # axe y
-             [  -f[0],  -f[1],  -f[2],  np.dot(f, p)],  # axe z
-             [  0,      0,      0,      1]]             # canal de translation
-            , dtype=np.float32)
-
+        self.view_dirty = True
+        self.version += 1
 
     def update_projection_matrix(self):
-        """actualisation de la matrice de projection"""
-        r = 1 / np.tan(math.radians(self.fov) / 2)  # conversion en radians
-        n = self.near                               # limite proche
-        f = self.far                                # limite éloignée
-        self.projection_matrix = np.array(
+        """invalide la matrice de projection"""
+        self.projection_dirty = True
+        self.version += 1
+
+    def calc_view_matrix(self):
+        """calcule la matrice de vue"""
+        r = self.right.tolist()
+        u = self.up.tolist()
+        f = self.forward.tolist()
+        p = self.pos.tolist()
+        return np.array(
+            [[  r[0],   r[1],   r[2],   -dot(r, p)], # axe x
+             [  u[0],   u[1],   u[2],   -dot(u, p)], # axe y
+             [  -f[0],  -f[1],  -f[2],  dot(f, p)],  # axe z
+             [  0,      0,      0,      1]]          # canal de translation
+            , dtype=np.float32)
+
+    def calc_projection_matrix(self):
+        """calcule la matrice de projection"""
+        r = 1 / math.tan(math.radians(self.fov) / 2)  # conversion en radians
+        n = self.near                                 # limite proche
+        f = self.far                                  # limite éloignée
+        return np.array(
             [[r/self.aspect, 0, 0, 0],              # mise à l'échelle horizontale
              [0, r, 0, 0],                          # mise à l'échelle verticale
              [0, 0, (f+n)/(f-n), -2*f*n/(f-n)],     # encodage de la profondeur
@@ -75,6 +114,19 @@ class Pov:
              , dtype=np.float32
         )
 
+    def snapshot(self):
+        """renvoie l'état de la caméra (transmis à un autre processus)"""
+        return self.pos.copy(), self.yaw, self.pitch, self.fov, self.aspect, self.near, self.far
+
+    def restore(self, state):
+        """replace la caméra dans un état obtenu avec snapshot()"""
+        pos, self.yaw, self.pitch, fov, aspect, near, far = state
+        self.pos[:] = pos
+        if (fov, aspect, near, far) != (self.fov, self.aspect, self.near, self.far):
+            self.fov, self.aspect, self.near, self.far = fov, aspect, near, far
+            self.update_projection_matrix()
+        self.update_view_matrix()
+
     # ___________________________________________________________ Vecteurs directionnels ___________________________________________________________    
     def update_directions(self):
         """actualise les vecteurs directionnels"""
@@ -84,46 +136,63 @@ class Pov:
     
     def calc_forward(self):
         """actualise le vecteur vers l'avant de la caméra"""
-        # valeurs trigonométriques
-        yaw_cos = np.cos(np.radians(self.yaw))
-        yaw_sin = np.sin(np.radians(self.yaw))
-        pitch_cos = np.cos(np.radians(self.pitch))
-        pitch_sin = np.sin(np.radians(self.pitch))
+        # valeurs trigonométriques (scalaires : math plutôt que numpy)
+        yaw = math.radians(self.yaw)
+        pitch = math.radians(self.pitch)
+        pitch_cos = math.cos(pitch)
         # vecteur directionnel
-        forward =  np.array([
-            yaw_sin * pitch_cos,      # x
-            -pitch_sin,               # y
-            -yaw_cos * pitch_cos,     # z
-        ], dtype=np.float32)
-        return forward / np.linalg.norm(forward)
+        return normalize((
+            math.sin(yaw) * pitch_cos,  # x
+            -math.sin(pitch),           # y
+            -math.cos(yaw) * pitch_cos, # z
+        ))
     
     def calc_right(self):
         """actualise le vecteur vers la droite de la caméra"""
-        right = np.cross(self.forward, self.world_up)
-        return right / np.linalg.norm(right)
+        return normalize(cross(self.forward.tolist(), self.world_up.tolist()))
 
     def calc_up(self):
         """actualise le vecteir vers le haut de la caméra"""
-        up = np.cross(self.right, self.forward)
-        return up / np.linalg.norm(up)
+        return normalize(cross(self.right.tolist(), self.forward.tolist()))
     
     # ___________________________________________________________ Méthodes dynamiques ___________________________________________________________
     def move(self, offset):
         """déplacement de la caméra"""
-        self.pos += self.right * offset[0] # déplacement latéral
-        self.pos += self.world_up * offset[1] # déplacement vertical
-        forward = np.array([self.forward[0], 0, self.forward[2]], dtype=np.float32)
-        forward = forward / np.linalg.norm(forward)
-        self.pos += forward * offset[2] # déplacement avant/arrière
+        dx, dy, dz = offset
+        r = self.right.tolist()
+        w = self.world_up.tolist()
+        f = self.forward.tolist()
+        norm = math.hypot(f[0], f[2]) # avant projeté sur le plan horizontal
+        fx, fz = f[0] / norm, f[2] / norm
+        self.pos += np.array([
+            r[0] * dx + w[0] * dy + fx * dz, # déplacement latéral, vertical et avant/arrière
+            r[1] * dx + w[1] * dy,
+            r[2] * dx + w[2] * dy + fz * dz,
+        ], dtype=np.float32)
         self.update_view_matrix(dirs=False)
 
     def rotate(self, dyaw, dpitch):
         """rotation de la caméra"""
         self.yaw = (self.yaw + dyaw) % 360
-        self.pitch = np.clip(self.pitch + dpitch, -89, 89)
+        self.pitch = min(max(self.pitch + dpitch, -89), 89)
         self.update_view_matrix()
 
     def change_fov(self, fov: int):
         """change la fov"""
         self.fov = fov
-        self.update_projection_matrix()
\ No newline at end of file
+        self.update_projection_matrix()
+
+def dot(a, b):
+    """produit scalaire de deux vecteurs 3D (listes)"""
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def cross(a, b):
+    """produit vectoriel de deux vecteurs 3D (listes)"""
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+
+def normalize(v):
+    """renvoie le vecteur unitaire (float32) de même direction"""
+    norm = math.sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2])
+    return np.array([v[0] / norm, v[1] / norm, v[2] / norm], dtype=np.float32)
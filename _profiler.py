@@ -0,0 +1,204 @@
+import csv
+import json
+import time
+import tracemalloc
+from collections import deque
+import numpy as np
+import pygame
+
+
+class Profiler:
+    """mesure du temps passé dans chaque étape de la frame (portées nommées) et compteurs de triangles"""
+    def __init__(self, window: int=300, enabled: bool=True):
+        self.enabled = enabled # désactivé : les portées ne mesurent plus rien
+        self.window = window # nombre de frames conservées pour les percentiles et la trace
+        self.frames = deque(maxlen=window) # frames terminées : (numéro, durée ms, {étape: ms}, {compteur: valeur})
+        self.frame = 0 # numéro de la frame en cours
+        self.frame_start = None
+        self.timings = {} # temps cumulés de la frame en cours (ms)
+        self.counters = {} # compteurs de la frame en cours
+        self.scopes = {} # portées réutilisées (une par nom)
+        self.overlay = False # affichage à l'écran des statistiques
+
+        # pic mémoire par étape (tracemalloc, coûteux : désactivé par défaut)
+        self.memory = False
+        self.memory_stack = [] # [mémoire à l'entrée, pic observé] des portées ouvertes
+        self.memory_peaks = {} # pic d'allocation de chaque étape (octets au-delà de la mémoire à l'entrée)
+        self.font = None # police de l'overlay (créée au premier affichage)
+
+    def scope(self, name: str):
+        """renvoie la portée de mesure d'une étape : with profiler.scope("render"): ..."""
+        if not self.enabled:
+            return NULL_SCOPE
+        scope = self.scopes.get(name)
+        if scope is None:
+            scope = self.scopes[name] = Scope(self, name)
+        return scope
+
+    def set_window(self, window: int):
+        """change le nombre de frames conservées"""
+        self.window = window
+        self.frames = deque(self.frames, maxlen=window)
+
+    def reset(self):
+        """vide l'historique des frames et les pics mémoire"""
+        self.frames.clear()
+        self.memory_peaks = {}
+
+    def set_memory(self, enabled: bool):
+        """active ou désactive la mesure du pic mémoire par étape"""
+        self.memory = enabled
+        self.memory_stack = []
+        self.memory_peaks = {}
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def memory_enter(self):
+        """ouvre la mesure mémoire d'une portée"""
+        current, peak = tracemalloc.get_traced_memory()
+        if self.memory_stack:
+            self.memory_stack[-1][1] = max(self.memory_stack[-1][1], peak)
+        self.memory_stack.append([current, current])
+        tracemalloc.reset_peak()
+
+    def memory_exit(self, name: str):
+        """ferme la mesure mémoire d'une portée et reporte son pic sur la portée englobante"""
+        _, peak = tracemalloc.get_traced_memory()
+        start, observed = self.memory_stack.pop()
+        peak = max(peak, observed)
+        self.memory_peaks[name] = max(self.memory_peaks.get(name, 0), peak - start)
+        if self.memory_stack:
+            self.memory_stack[-1][1] = max(self.memory_stack[-1][1], peak)
+
+    def add_time(self, name: str, ms: float):
+        """ajoute une durée (ms) à une étape de la frame en cours"""
+        self.timings[name] = self.timings.get(name, 0.0) + ms
+
+    def count(self, name: str, value: int):
+        """ajoute une valeur à un compteur de la frame en cours (triangles reçus, rejetés, dessinés...)"""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def begin_frame(self):
+        """démarre la mesure d'une frame"""
+        self.frame_start = time.perf_counter()
+        self.timings = {}
+        self.counters = {}
+
+    def end_frame(self):
+        """clôt la frame en cours et l'ajoute à l'historique"""
+        if self.frame_start is None:
+            return
+        if self.enabled:
+            duration = (time.perf_counter() - self.frame_start) * 1000
+            self.frames.append((self.frame, duration, self.timings, self.counters))
+        self.frame += 1
+        self.frame_start = None
+
+    def stats(self):
+        """renvoie {étape: {p50, p95, p99, mean}} (ms) sur les frames de l'historique, "frame" pour la frame entière"""
+        if not self.frames:
+            return {}
+        names = {"frame": None}
+        for _, _, timings, _ in self.frames:
+            names.update(dict.fromkeys(timings))
+        stats = {}
+        for name in names:
+            values = np.array([duration if name == "frame" else timings.get(name, 0.0) for _, duration, timings, _ in self.frames])
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            stats[name] = {"p50": float(p50), "p95": float(p95), "p99": float(p99), "mean": float(values.mean())}
+        return stats
+
+    def counter_stats(self):
+        """renvoie la moyenne de chaque compteur sur les frames de l'historique"""
+        names = {}
+        for _, _, _, counters in self.frames:
+            names.update(dict.fromkeys(counters))
+        return {name: float(np.mean([counters.get(name, 0) for _, _, _, counters in self.frames])) for name in names}
+
+    def dump(self, path: str):
+        """écrit la trace des frames de l'historique en JSON (avec le résumé) ou en CSV (une ligne par frame)"""
+        timing_names = [name for name in self.stats() if name != "frame"]
+        counter_names = list(self.counter_stats())
+        if path.endswith(".csv"):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(["frame", "frame_ms"] + [f"{name}_ms" for name in timing_names] + counter_names)
+                for number, duration, timings, counters in self.frames:
+                    writer.writerow([number, round(duration, 4)]
+                                    + [round(timings.get(name, 0.0), 4) for name in timing_names]
+                                    + [counters.get(name, 0) for name in counter_names])
+            return path
+
+        trace = {
+            "summary": {name: {key: round(value, 4) for key, value in values.items()} for name, values in self.stats().items()},
+            "counters": self.counter_stats(),
+            "memory_peaks": self.memory_peaks,
+            "frames": [{"frame": number, "frame_ms": round(duration, 4),
+                        "timings": {name: round(value, 4) for name, value in timings.items()}, "counters": counters}
+                       for number, duration, timings, counters in self.frames],
+        }
+        with open(path, 'w') as f:
+            json.dump(trace, f, indent=1)
+        return path
+
+    def toggle_overlay(self):
+        """affiche ou masque les statistiques à l'écran"""
+        self.overlay = not self.overlay
+
+    def draw_overlay(self, surface):
+        """affiche p50 / p95 / p99 de chaque étape et les compteurs en haut à gauche de la surface"""
+        if not self.overlay:
+            return
+        if self.font is None:
+            self.font = pygame.font.SysFont("consolas,dejavusansmono,monospace", 14)
+        lines = [f"{'étape':<22}{'p50':>8}{'p95':>8}{'p99':>8}  ms"]
+        for name, values in self.stats().items():
+            lines.append(f"{name:<22}{values['p50']:>8.2f}{values['p95']:>8.2f}{values['p99']:>8.2f}")
+        for name, value in self.counter_stats().items():
+            lines.append(f"{name:<22}{value:>8.0f}")
+
+        height = self.font.get_linesize()
+        background = pygame.Surface((330, height * len(lines) + 8), pygame.SRCALPHA)
+        background.fill((0, 0, 0, 160))
+        surface.blit(background, (0, 0))
+        for i, line in enumerate(lines):
+            surface.blit(self.font.render(line, True, (255, 255, 255)), (6, 4 + i * height))
+
+
+class Scope:
+    """portée de mesure d'une étape (gestionnaire de contexte)"""
+    __slots__ = ['profiler', 'name', 'start']
+
+    def __init__(self, profiler: Profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        if self.profiler.memory:
+            self.profiler.memory_enter()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add_time(self.name, (time.perf_counter() - self.start) * 1000)
+        if self.profiler.memory:
+            self.profiler.memory_exit(self.name)
+        return False
+
+
+class NullScope:
+    """portée sans effet (profiler désactivé)"""
+    __slots__ = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SCOPE = NullScope()
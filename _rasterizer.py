@@ -0,0 +1,294 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pygame
+from _bvh import ranges_indices
+
+
+class ZBufferRasterizer:
+    """rastériseur logiciel vectorisé avec tampon de profondeur"""
+    def __init__(self, size: tuple, tile: int=64, budget: int=1 << 20, workers: int=1, screen_tile: int=128):
+        self.tile = tile # taille maximale (multiple de 4) d'une tuile de rastérisation
+        self.budget = budget # nombre maximal de pixels évalués par passe vectorisée
+
+        # rastérisation parallèle : l'écran est découpé en tuiles traitées par un pool de threads
+        self.workers = workers # nombre de threads (1 : rendu séquentiel)
+        self.screen_tile = screen_tile # côté des tuiles d'écran en pixels
+        self.executor = None # créé au premier rendu parallèle
+        self.executor_workers = 0 # nombre de threads de l'executor courant
+
+        self.width = 0
+        self.height = 0
+        self.color = None # tampon couleur (largeur, hauteur, 3), disposition de pygame.surfarray
+        self.depth = None # tampon de profondeur (largeur, hauteur)
+        self.resize(size)
+
+    def resize(self, size: tuple):
+        """réalloue les tampons à la taille donnée"""
+        self.width, self.height = int(size[0]), int(size[1])
+        self.color = np.zeros((self.width, self.height, 3), dtype=np.uint8)
+        self.depth = np.full((self.width, self.height), np.inf, dtype=np.float32)
+
+    def clear(self, background: tuple):
+        """efface les tampons"""
+        self.color[:] = background
+        self.depth[:] = np.inf
+
+    def blit(self, surface):
+        """copie le tampon couleur sur une surface pygame de même taille"""
+        pygame.surfarray.blit_array(surface, self.color)
+
+    def draw(self, batch):
+        """rastérise un lot de triangles sur tout l'écran (en parallèle si workers > 1)"""
+        if self.workers > 1 and len(batch):
+            self.draw_parallel(batch)
+        else:
+            self.draw_rect(batch)
+
+    def draw_parallel(self, batch):
+        """répartit les triangles par tuile d'écran et rastérise les tuiles en parallèle
+        les tuiles sont disjointes : chaque thread écrit dans sa propre zone des tampons partagés"""
+        if self.executor_workers != self.workers:
+            if self.executor is not None:
+                self.executor.shutdown()
+            self.executor = ThreadPoolExecutor(max_workers=self.workers)
+            self.executor_workers = self.workers
+
+        # tuiles d'écran couvertes par la boîte englobante de chaque triangle
+        size = self.screen_tile
+        n_x, n_y = -(-self.width // size), -(-self.height // size)
+        with np.errstate(invalid='ignore'):
+            lo = np.floor(batch.screen.min(axis=1) / size)
+            hi = np.floor(batch.screen.max(axis=1) / size)
+        lo = np.clip(np.nan_to_num(lo, nan=n_x), 0, [n_x, n_y]).astype(np.int64)
+        hi = np.clip(np.nan_to_num(hi, nan=-1), -1, [n_x - 1, n_y - 1]).astype(np.int64)
+        count_x = np.maximum(hi[:, 0] - lo[:, 0] + 1, 0)
+        count_y = np.maximum(hi[:, 1] - lo[:, 1] + 1, 0)
+        counts = count_x * count_y
+
+        # paires (triangle, tuile) regroupées par tuile
+        triangles = np.repeat(np.arange(len(batch)), counts)
+        k = np.arange(len(triangles)) - np.repeat(np.cumsum(counts) - counts, counts)
+        tile_x = lo[triangles, 0] + k % np.maximum(count_x[triangles], 1)
+        tile_y = lo[triangles, 1] + k // np.maximum(count_x[triangles], 1)
+        tiles = tile_y * n_x + tile_x
+        if not len(tiles):
+            return
+        order = np.argsort(tiles, kind='stable')
+        tiles, triangles = tiles[order], triangles[order]
+        bounds = np.flatnonzero(np.diff(tiles)) + 1
+
+        jobs = []
+        for tile, group in zip(tiles[np.r_[0, bounds]].tolist(), np.split(triangles, bounds)):
+            x, y = (tile % n_x) * size, (tile // n_x) * size
+            rect = (x, y, min(x + size, self.width), min(y + size, self.height))
+            jobs.append(self.executor.submit(self.draw_rect, batch.take(group), rect))
+        for job in jobs:
+            job.result()
+
+    def draw_rect(self, batch, rect: tuple=None):
+        """rastérise un lot de triangles, éventuellement limité au rectangle (x0, y0, x1, y1) exclu"""
+        x_min, y_min, x_max, y_max = rect or (0, 0, self.width, self.height)
+        if not len(batch):
+            return
+
+        P = batch.screen
+        x0, y0 = P[:, 0, 0], P[:, 0, 1]
+        x1, y1 = P[:, 1, 0], P[:, 1, 1]
+        x2, y2 = P[:, 2, 0], P[:, 2, 1]
+        area = (x1 - x0) * (y2 - y0) - (x2 - x0) * (y1 - y0)
+
+        # boîte englobante en pixels (centres de pixels inclus dans le triangle)
+        with np.errstate(invalid='ignore'):
+            left = np.maximum(np.ceil(P[:, :, 0].min(axis=1) - 0.5), x_min)
+            right = np.minimum(np.floor(P[:, :, 0].max(axis=1) - 0.5), x_max - 1)
+            top = np.maximum(np.ceil(P[:, :, 1].min(axis=1) - 0.5), y_min)
+            bottom = np.minimum(np.floor(P[:, :, 1].max(axis=1) - 0.5), y_max - 1)
+            valid = (left <= right) & (top <= bottom) & (area != 0) & np.isfinite(area)
+        triangles = np.flatnonzero(valid)
+        if not len(triangles):
+            return
+
+        left, right = left[triangles].astype(np.int64), right[triangles].astype(np.int64)
+        top, bottom = top[triangles].astype(np.int64), bottom[triangles].astype(np.int64)
+
+        # découpage de chaque boîte en tuiles de côté multiple de 4 (au plus self.tile)
+        tile_w = np.minimum(round_up(right - left + 1, 4), self.tile)
+        tile_h = np.minimum(round_up(bottom - top + 1, 4), self.tile)
+        n_x = -(-(right - left + 1) // tile_w)
+        n_y = -(-(bottom - top + 1) // tile_h)
+        n_tiles = n_x * n_y
+
+        owner = np.repeat(np.arange(len(triangles)), n_tiles)
+        k = np.arange(len(owner)) - np.repeat(np.cumsum(n_tiles) - n_tiles, n_tiles)
+        origin_x = left[owner] + (k % n_x[owner]) * tile_w[owner]
+        origin_y = top[owner] + (k // n_x[owner]) * tile_h[owner]
+
+        # données par triangle utilisées par le noyau
+        inv_area = (1 / area[triangles]).astype(np.float32)
+        data = (P[triangles], batch.z[triangles], inv_area, right, bottom, batch.colors[triangles])
+
+        # regroupement des tuiles par format pour les évaluer par paquets
+        shape_key = tile_w[owner] * (self.tile + 1) + tile_h[owner]
+        order = np.argsort(shape_key, kind='stable')
+        bounds = np.flatnonzero(np.diff(shape_key[order])) + 1
+        for group in np.split(order, bounds):
+            w, h = int(tile_w[owner[group[0]]]), int(tile_h[owner[group[0]]])
+            step = max(1, self.budget // (w * h))
+            for start in range(0, len(group), step):
+                tiles = group[start:start + step]
+                self.draw_tiles(owner[tiles], origin_x[tiles], origin_y[tiles], w, h, data)
+
+    def draw_tiles(self, owner, origin_x, origin_y, w: int, h: int, data: tuple):
+        """évalue un paquet de tuiles de même format (w, h) et écrit les fragments visibles"""
+        P, Z, inv_area, right, bottom, colors = data
+        Z = Z[owner]
+
+        # sommets dans le repère de la tuile (pixel local (i, j) centré en (i, j))
+        Q = P[owner].astype(np.float64) - np.stack([origin_x, origin_y], axis=1)[:, None, :] - 0.5
+        x, y = Q[:, :, 0], Q[:, :, 1]
+        x0, x1, x2 = x[:, 0], x[:, 1], x[:, 2]
+        y0, y1, y2 = y[:, 0], y[:, 1], y[:, 2]
+
+        # fonctions d'arête affines normalisées : l_k(i, j) = A_k * i + B_k * j + C_k (coordonnées barycentriques)
+        scale = inv_area[owner][:, None]
+        A = np.stack([y1 - y2, y2 - y0, y0 - y1], axis=1) * scale
+        B = np.stack([x2 - x1, x0 - x2, x1 - x0], axis=1) * scale
+        C = np.stack([x1 * y2 - x2 * y1, x2 * y0 - x0 * y2, x0 * y1 - x1 * y0], axis=1) * scale
+
+        # termes colonne (B, 1, w) et ligne (B, h, 1), pixels hors de la boîte englobante exclus par -inf
+        i = np.arange(w, dtype=np.float32)
+        j = np.arange(h, dtype=np.float32)
+        columns = A[:, :, None, None].astype(np.float32) * i
+        rows = B[:, :, None].astype(np.float32) * j + C[:, :, None].astype(np.float32)
+        rows = rows[:, :, :, None]
+        columns[:, 0] = np.where(i <= (right[owner] - origin_x)[:, None, None], columns[:, 0], -np.inf)
+        rows[:, 0] = np.where(j[:, None] <= (bottom[owner] - origin_y)[:, None, None], rows[:, 0], -np.inf)
+
+        inside = columns[:, 0] + rows[:, 0] >= 0
+        inside &= columns[:, 1] + rows[:, 1] >= 0
+        inside &= columns[:, 2] + rows[:, 2] >= 0
+
+        b, j, i = np.nonzero(inside)
+        if not len(b):
+            return
+
+        # profondeur interpolée aux fragments uniquement (plan z = zA * i + zB * j + zC de chaque tuile)
+        zA, zB, zC = [(coefficients * Z).sum(axis=1).astype(np.float32) for coefficients in (A, B, C)]
+        z = (zA[b] * i.astype(np.float32) + zB[b] * j.astype(np.float32) + zC[b]).astype(np.float32, copy=False)
+
+        # test de profondeur : le fragment le plus proche de chaque pixel l'emporte
+        # (z et le tampon doivent partager le même type, sinon ufunc.at repasse par la boucle générique lente)
+        pixels = (origin_x[b] + i) * self.height + origin_y[b] + j
+        depth = self.depth.reshape(-1)
+        np.minimum.at(depth, pixels, z)
+        visible = depth[pixels] == z
+        self.color.reshape(-1, 3)[pixels[visible]] = colors[owner[b[visible]]]
+
+
+class ScanlineRasterizer:
+    """remplissage groupé de triangles unis dans l'ordre du peintre, sans appel python par triangle
+    reproduit la règle de remplissage de pygame.draw.polygon (sommets tronqués en entiers, intersection de
+    chaque ligne avec les arêtes tronquée, segments bornes incluses) : résultat identique au pixel près"""
+    def __init__(self, size: tuple, budget: int=1 << 21):
+        self.budget = budget # nombre maximal de pixels écrits par passe vectorisée
+        self.width = 0
+        self.height = 0
+        self.owner = None # rang du dernier triangle couvrant chaque pixel (hauteur * largeur), -1 : fond
+        self.resize(size)
+
+    def resize(self, size: tuple):
+        """réalloue le tampon à la taille donnée"""
+        self.width, self.height = int(size[0]), int(size[1])
+        self.owner = np.empty(self.width * self.height, dtype=np.int32)
+
+    def draw(self, surface, batch, order=None):
+        """remplit les triangles du lot sur la surface, dans l'ordre donné (le dernier recouvre les précédents)"""
+        if order is not None:
+            batch = batch.take(order)
+        owner = self.owner
+        owner[:] = -1
+        spans = self.spans(batch.screen)
+        if spans is None:
+            return
+
+        # segments découpés en paquets d'au plus budget pixels, rang du triangle le plus récent par pixel
+        triangles, y, left, count = spans
+        ends = np.cumsum(count)
+        cuts = np.searchsorted(ends, np.arange(self.budget, ends[-1], self.budget), side='right')
+        for start, stop in zip(np.r_[0, cuts].tolist(), np.r_[cuts, len(count)].tolist()):
+            n = count[start:stop]
+            pixels = ranges_indices(y[start:stop] * self.width + left[start:stop], n)
+            np.maximum.at(owner, pixels, np.repeat(triangles[start:stop], n)) # même type que owner (boucle rapide de ufunc.at)
+
+        # écriture directe dans les pixels de la surface
+        pixels = np.flatnonzero(owner >= 0)
+        colors = batch.colors[owner[pixels]]
+        if surface.get_bytesize() == 4 and surface.get_pitch() == 4 * self.width:
+            # surface 32 bits sans marge : vue 2d (hauteur, largeur) aplatie sans copie, une écriture par pixel
+            view = pygame.surfarray.pixels2d(surface)
+            view.T.reshape(-1)[pixels] = map_colors(surface, colors)
+        else:
+            view = pygame.surfarray.pixels3d(surface)
+            view[pixels % self.width, pixels // self.width] = colors
+        del view # libère le verrou de la surface
+
+    def spans(self, screen):
+        """renvoie les segments horizontaux (triangle, ligne, début, longueur) découpés à l'écran, ou None"""
+        finite = np.isfinite(screen).all(axis=(1, 2))
+        P = np.where(finite[:, None, None], screen, 0).astype(np.int64) # troncature des sommets, comme pygame
+        X, Y = P[..., 0], P[..., 1]
+
+        # sommets triés par ligne : haut, milieu, bas
+        k = np.argsort(Y, axis=1, kind='stable')
+        X, Y = np.take_along_axis(X, k, axis=1), np.take_along_axis(Y, k, axis=1)
+        top, bottom = Y[:, 0], Y[:, 2]
+        first = np.maximum(top, 0)
+        rows = np.maximum(np.where(finite, np.minimum(bottom, self.height - 1) - first + 1, 0), 0)
+        triangles = np.repeat(np.arange(len(P)), rows)
+        if not len(triangles):
+            return None
+        y = ranges_indices(first, rows)
+        k = ranges_indices(first - top, rows).astype(np.float64) # ligne relative au sommet du haut
+
+        # chaque ligne coupe l'arête longue (haut -> bas) et une arête courte : haut -> milieu au-dessus du
+        # sommet du milieu (ou jusqu'en bas si le milieu est sur la dernière ligne), milieu -> bas ensuite
+        # pygame tronque (y - y1) * (x2 - x1) / (y2 - y1) + x1 : même valeur que (base + k * dx) / dy tronqué,
+        # avec base et k * dx entiers exacts en double
+        dy, dy1, dy2 = Y[:, 2] - Y[:, 0], Y[:, 1] - Y[:, 0], Y[:, 2] - Y[:, 1]
+        dx, dx1, dx2 = X[:, 2] - X[:, 0], X[:, 1] - X[:, 0], X[:, 2] - X[:, 1]
+        long_edge = [X[:, 0] * dy, dx, dy]
+        short_edges = [np.stack([X[:, 0] * dy1, X[:, 1] * dy2 - dy1 * dx2], axis=1), # haut -> milieu, milieu -> bas
+                       np.stack([dx1, dx2], axis=1), np.stack([dy1, dy2], axis=1)]
+
+        # triangle d'une seule ligne : segment entre les sommets extrêmes
+        flat = dy == 0
+        if flat.any():
+            long_edge = [np.where(flat, X.min(axis=1), long_edge[0]), np.where(flat, 0, dx), np.where(flat, 1, dy)]
+            short_edges = [np.where(flat[:, None], X.max(axis=1)[:, None], short_edges[0]),
+                           np.where(flat[:, None], 0, short_edges[1]), np.where(flat[:, None], 1, short_edges[2])]
+
+        # paramètres gathérés colonne par colonne (np.take sur des tableaux contigus)
+        split = np.where(dy2 == 0, np.iinfo(np.int64).max, dy1) # première ligne relative de l'arête milieu -> bas
+        short = 2 * triangles + (k >= np.take(split, triangles))
+        base, slope, height = [np.take(column.astype(np.float64), triangles) for column in long_edge]
+        a = np.trunc((base + k * slope) / height)
+        base, slope, height = [np.take(column.astype(np.float64).reshape(-1), short) for column in short_edges]
+        b = np.trunc((base + k * slope) / height)
+
+        left = np.maximum(np.minimum(a, b), 0).astype(np.int64)
+        right = np.minimum(np.maximum(a, b), self.width - 1).astype(np.int64)
+        return triangles.astype(np.int32), y, left, np.maximum(right - left + 1, 0)
+
+
+def map_colors(surface, colors):
+    """convertit des couleurs (N, 3) en valeurs de pixel de la surface (équivalent vectorisé de map_rgb)"""
+    shifts, losses, masks = surface.get_shifts(), surface.get_losses(), surface.get_masks()
+    values = np.full(len(colors), masks[3], dtype=np.uint32) # alpha opaque
+    for c in range(3):
+        values |= (colors[:, c].astype(np.uint32) >> losses[c]) << shifts[c]
+    return values
+
+
+def round_up(values, step: int):
+    """arrondit chaque valeur au multiple de step supérieur"""
+    return -(-values // step) * step
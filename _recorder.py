@@ -0,0 +1,87 @@
+import struct
+import numpy as np
+
+# format d'un enregistrement de caméra :
+# en-tête : magic, version, nombre de frames, puis un état de caméra par frame (little endian, 28 octets)
+
+MAGIC = b"CAMP"
+VERSION = 1
+EXTENSION = ".campath"
+
+HEADER = struct.Struct("<4sIQ") # magic, version, nombre de frames
+FRAME = np.dtype([("pos", "<f4", 3), ("yaw", "<f4"), ("pitch", "<f4"), ("fov", "<f4"), ("dt", "<f4")])
+
+
+class CameraRecorder:
+    """enregistre l'état du Pov à chaque frame"""
+    def __init__(self, pov):
+        self.pov = pov
+        self.recording = False
+        self.frames = [] # états enregistrés (pos x, y, z, yaw, pitch, fov, dt)
+
+    def start(self):
+        """démarre un nouvel enregistrement"""
+        self.frames = []
+        self.recording = True
+
+    def stop(self):
+        """arrête l'enregistrement"""
+        self.recording = False
+
+    def record_frame(self, dt: float):
+        """ajoute l'état courant de la caméra (dt : durée de la frame en secondes)"""
+        if self.recording:
+            pov = self.pov
+            self.frames.append((*pov.pos.tolist(), float(pov.yaw), float(pov.pitch), float(pov.fov), dt))
+
+    def save(self, path: str):
+        """écrit l'enregistrement dans un fichier binaire"""
+        data = np.zeros(len(self.frames), dtype=FRAME)
+        if self.frames:
+            values = np.array(self.frames, dtype=np.float32)
+            data["pos"] = values[:, :3]
+            data["yaw"], data["pitch"], data["fov"], data["dt"] = values[:, 3:].T
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(data)))
+            f.write(data.tobytes())
+        return path
+
+
+class CameraReplay:
+    """rejoue un enregistrement de caméra frame par frame (pas de temps fixe : une frame enregistrée par frame rendue)"""
+    def __init__(self, pov, path: str):
+        self.pov = pov
+        self.frames = load_camera_path(path)
+        self.frame = 0 # prochaine frame à appliquer
+
+    def __len__(self):
+        return len(self.frames)
+
+    def done(self):
+        """indique si toutes les frames ont été rejouées"""
+        return self.frame >= len(self.frames)
+
+    def apply(self):
+        """place la caméra dans l'état de la frame suivante et renvoie la durée enregistrée de cette frame (s)"""
+        state = self.frames[self.frame]
+        self.frame += 1
+        pov = self.pov
+        pov.pos[:] = state["pos"]
+        pov.yaw = float(state["yaw"])
+        pov.pitch = float(state["pitch"])
+        if float(state["fov"]) != pov.fov:
+            pov.change_fov(float(state["fov"]))
+        pov.update_view_matrix()
+        return float(state["dt"])
+
+
+def load_camera_path(path: str):
+    """renvoie les états enregistrés (tableau structuré FRAME)"""
+    with open(path, 'rb') as f:
+        magic, version, count = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} n'est pas un enregistrement de caméra (version {VERSION})")
+        data = np.frombuffer(f.read(count * FRAME.itemsize), dtype=FRAME)
+    if len(data) != count:
+        raise ValueError(f"{path} est tronqué ({len(data)} frames sur {count})")
+    return data
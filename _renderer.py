@@ -1,19 +1,116 @@
+import math
 import pygame
 import numpy as np
+from _rasterizer import ZBufferRasterizer, ScanlineRasterizer
 
 
-class Renderer:    
-    def __init__(self, main, quality=0.5):
+class Renderer:
+    def __init__(self, main, quality=0.5, backend="painter", dynamic_resolution=False, min_quality=0.25, max_quality=1.0, workers=1):
         self.main = main
         self.pov = main.pov
+        self.background = (50, 50, 50)
+
+        # résolution interne : quality x taille de l'écran virtuel, agrandie une seule fois à l'affichage
+        self.quality = quality
+        self.surface = None # surface de rendu interne
+        self.set_quality(quality)
+
+        # résolution dynamique : ajuste quality pour tenir le temps de frame visé
+        self.dynamic_resolution = dynamic_resolution
+        self.min_quality = min_quality
+        self.max_quality = max_quality
+        self.quality_step = 0.05 # pas de quantification (évite de réallouer la surface à chaque frame)
+        self.target_quality = quality # valeur continue avant quantification
+
+        # mode de rendu : "painter" (tri + remplissage par segments) ou "zbuffer" (rastériseur numpy)
+        self.backend = backend
+        self.rasterizer = None
+        self.workers = workers # threads de rastérisation du mode "zbuffer"
+        self.previous_order = None # ordre de dessin de la frame précédente (mode "painter")
+        self.scanline = None # remplissage groupé des triangles du mode "painter"
+
+    @property
+    def size(self):
+        """taille de la surface de rendu interne"""
+        return self.surface.get_size()
+
+    def set_quality(self, quality: float):
+        """change la résolution interne de rendu"""
         self.quality = quality
-    
-    def draw_scene(self):
+        size = (max(1, round(self.main.screen_width * quality)), max(1, round(self.main.screen_height * quality)))
+        if self.surface is None or self.surface.get_size() != size:
+            self.surface = pygame.Surface(size)
+
+    def update_quality(self):
+        """adapte la résolution au temps de calcul de la frame précédente (Main.clock)"""
+        frame_time = self.main.clock.get_rawtime() # ms, sans l'attente de limitation des fps
+        if frame_time <= 0:
+            return
+        target_time = 1000 / self.main.fps_max
+
+        # le coût de rastérisation est proportionnel au nombre de pixels (quality²), ajustement amorti
+        wanted = self.target_quality * math.sqrt(target_time / frame_time)
+        self.target_quality += (wanted - self.target_quality) * 0.25
+        self.target_quality = min(max(self.target_quality, self.min_quality), self.max_quality)
+
+        quality = round(self.target_quality / self.quality_step) * self.quality_step
+        if abs(quality - self.quality) > 1e-6:
+            self.set_quality(quality)
+
+    def draw_scene(self, batch=None, size: tuple=None):
+        """rend la scène dans la surface interne
+        batch : triangles déjà calculés (rendu en pipeline) pour une surface de taille size, sinon calculés ici"""
+        if self.dynamic_resolution:
+            self.update_quality()
+
+        profiler = self.main.profiler
+        if batch is None:
+            with profiler.scope("render.scene"):
+                batch = self.main.env.screen_batch(self.size)
+        elif size != self.size: # résolution changée depuis le calcul du lot : mise à l'échelle des coordonnées
+            batch.screen *= np.array(self.size, dtype=np.float32) / np.array(size, dtype=np.float32)
+        profiler.count("triangles.drawn", len(batch))
+
+        if self.backend == "zbuffer":
+            self.draw_scene_zbuffer(batch)
+            return
+
         # background
-        self.main.screen.fill((50, 50, 50))
+        self.surface.fill(self.background)
+
+        with profiler.scope("render.sort"):
+            order = self.depth_order(batch.depth)
+
+        with profiler.scope("render.draw"):
+            # remplissage groupé des triangles du plus lointain au plus proche
+            if self.scanline is None:
+                self.scanline = ScanlineRasterizer(self.size)
+            elif (self.scanline.width, self.scanline.height) != self.size:
+                self.scanline.resize(self.size)
+            self.scanline.draw(self.surface, batch, order)
+
+    def depth_order(self, depth):
+        """renvoie l'ordre de dessin des triangles (profondeurs croissantes : du plus lointain au plus proche)
+        d'une frame à l'autre l'ordre varie peu : si l'ordre précédent trie encore les profondeurs (caméra et
+        objets immobiles), il est réutilisé après une simple vérification en O(T), sinon argsort numpy"""
+        previous = self.previous_order
+        if previous is not None and len(previous) == len(depth):
+            ordered = depth[previous]
+            if (ordered[1:] >= ordered[:-1]).all():
+                return previous
+        order = np.argsort(depth)
+        self.previous_order = order
+        return order
 
-        triangles = self.main.env.screen_triangles
-        triangles.sort(key=lambda t: t[3])
+    def draw_scene_zbuffer(self, batch):
+        """rendu par tampon de profondeur : aucun tri, une seule copie vers l'écran"""
+        size = self.size
+        if self.rasterizer is None:
+            self.rasterizer = ZBufferRasterizer(size, workers=self.workers)
+        elif (self.rasterizer.width, self.rasterizer.height) != size:
+            self.rasterizer.resize(size)
 
-        for triangle in triangles: # dessin des triangles à l'écran
-            pygame.draw.polygon(self.main.screen, triangle[4],  [(float(triangle[i][0]), float(triangle[i][1])) for i in range(3)])
\ No newline at end of file
+        self.rasterizer.clear(self.background)
+        with self.main.profiler.scope("render.draw"):
+            self.rasterizer.draw(batch)
+            self.rasterizer.blit(self.surface)
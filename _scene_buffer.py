@@ -0,0 +1,151 @@
+import numpy as np
+from _bvh import BVH, ranges_indices
+
+
+class SceneBuffer:
+    """tampons contigus regroupant les vertexs monde, indexes et couleurs de tous les objets statiques"""
+    def __init__(self, graph, capacity: int=1024):
+        self.graph = graph # graphe de scène des objets du tampon
+        # stockage avec capacité (croissance par doublement)
+        self.vertices_data = np.empty((capacity, 4), dtype=np.float32)
+        self.indexes_data = np.empty((capacity, 3), dtype=np.int32)
+        self.colors_data = np.empty((capacity, 3), dtype=np.uint8)
+        self.faces_data = np.empty((capacity, 6), dtype=np.float32) # normales et centres monde des triangles (éclairage)
+
+        self.n_vertices = 0 # nombre de vertexs utilisés
+        self.n_triangles = 0 # nombre de triangles utilisés
+
+        self.entries = [] # [objet, début vertexs, nombre vertexs, début triangles, nombre triangles, version, triangles utilisés]
+        self.nodes = np.empty(capacity, dtype=np.int64) # noeud du graphe de scène de chaque objet
+        self.versions = np.empty(capacity, dtype=np.int64) # version de la transformation recopiée dans le tampon
+        self.lod_entries = [] # indices des objets ayant des niveaux de détail
+        self.reduced = 0 # nombre d'objets affichés à un niveau de détail réduit
+
+        # culling par objet : hiérarchie de boîtes englobantes, reconstruite quand un objet change
+        self.bvh = None
+        self.ranges = None # plages de chaque objet dans les tampons (4, objets) : début / nombre vertexs, début / nombre triangles utilisés
+
+    @property
+    def vertices(self):
+        """vertexs homogènes de la scène (N, 4)"""
+        return self.vertices_data[:self.n_vertices]
+
+    @property
+    def indexes(self):
+        """indexes des triangles dans le tampon partagé (T, 3)"""
+        return self.indexes_data[:self.n_triangles]
+
+    @property
+    def colors(self):
+        """couleurs de chaque triangle (T, 3)"""
+        return self.colors_data[:self.n_triangles]
+
+    @property
+    def faces(self):
+        """normales et centres monde de chaque triangle (T, 6)"""
+        return self.faces_data[:self.n_triangles]
+
+    def add(self, obj):
+        """ajoute un objet à la fin des tampons"""
+        mesh = obj.mesh
+        V_h = obj.get_world_vertices()
+        n_v = len(V_h)
+        n_t = len(mesh.indexes)
+        v_start, t_start = self.n_vertices, self.n_triangles
+
+        self.vertices_data = self.reserve(self.vertices_data, v_start + n_v)
+        self.indexes_data = self.reserve(self.indexes_data, t_start + n_t)
+        self.colors_data = self.reserve(self.colors_data, t_start + n_t)
+        self.faces_data = self.reserve(self.faces_data, t_start + n_t)
+
+        # copie avec décalage des indexes dans le tampon partagé
+        # (la plage de triangles est dimensionnée pour le niveau de détail complet)
+        self.vertices_data[v_start:v_start + n_v] = V_h
+        self.n_vertices += n_v
+        self.n_triangles += n_t
+        self.entries.append([obj, v_start, n_v, t_start, n_t, obj.transform_version, n_t])
+        count = len(self.entries)
+        self.nodes = self.reserve(self.nodes, count)
+        self.versions = self.reserve(self.versions, count)
+        self.nodes[count - 1], self.versions[count - 1] = obj.node, obj.transform_version
+        if len(mesh.lod_indexes) > 1:
+            self.lod_entries.append(len(self.entries) - 1)
+        self.bvh = None
+        self.ranges = None # plages reconstruites avec la hiérarchie (nouvel objet)
+        self.write_level(len(self.entries) - 1, obj.lod_level)
+
+    def write_level(self, index: int, level: int):
+        """écrit les triangles du niveau de détail donné dans la plage d'un objet"""
+        entry = self.entries[index]
+        obj, v_start, t_start, n_t = entry[0], entry[1], entry[3], entry[4]
+        indexes, colors = obj.mesh.lod_indexes[level], obj.mesh.lod_colors[level]
+        used = len(indexes)
+        np.add(indexes, v_start, out=self.indexes_data[t_start:t_start + used])
+        self.colors_data[t_start:t_start + used] = colors
+        self.faces_data[t_start:t_start + used] = obj.world_faces(level)
+
+        self.reduced += (used < n_t) - (entry[6] < n_t)
+        entry[6] = used
+        obj.lod_level = level
+        if self.ranges is not None and index < self.ranges.shape[1]:
+            self.ranges[3, index] = used
+
+    def refresh(self):
+        """recopie les vertexs monde des objets dont la transformation a changé
+        (comparaison vectorisée des versions du graphe de scène, seuls les objets modifiés sont parcourus)"""
+        count = len(self.entries)
+        if not count:
+            return
+        self.graph.update()
+        versions = self.graph.versions[self.nodes[:count]]
+        changed = np.flatnonzero(versions != self.versions[:count])
+        for i in changed.tolist():
+            entry = self.entries[i]
+            obj, v_start, n_v, t_start, used = entry[0], entry[1], entry[2], entry[3], entry[6]
+            self.vertices_data[v_start:v_start + n_v] = obj.get_world_vertices()
+            self.faces_data[t_start:t_start + used] = obj.world_faces(obj.lod_level)
+            entry[5] = obj.transform_version
+        if len(changed):
+            self.versions[changed] = versions[changed]
+            self.bvh = None
+
+    def update_bvh(self):
+        """reconstruit la hiérarchie de boîtes englobantes des objets du tampon"""
+        bounds = [entry[0].world_bounds() for entry in self.entries]
+        self.bvh = BVH([b[0] for b in bounds], [b[1] for b in bounds])
+        self.ranges = np.array([entry[1:4] + entry[6:7] for entry in self.entries], dtype=np.int64).reshape(-1, 4).T
+
+    def visible(self, planes):
+        """renvoie les indices (triés) des objets intersectant le frustum de plans donnés"""
+        if self.bvh is None:
+            self.update_bvh()
+        return self.bvh.query(planes)
+
+    def select(self, visible=None):
+        """renvoie (vertexs, indexes, couleurs, normales et centres) des objets d'indices donnés (tous par défaut)
+        à leur niveau de détail courant"""
+        if visible is None or len(visible) == len(self.entries):
+            if not self.reduced:
+                return self.vertices, self.indexes, self.colors, self.faces
+            visible = np.arange(len(self.entries))
+        if self.ranges is None:
+            self.update_bvh()
+
+        v_start, n_v, t_start, n_t = self.ranges[:, visible]
+        vertices = self.vertices_data[ranges_indices(v_start, n_v)]
+        triangles = ranges_indices(t_start, n_t)
+
+        # décalage des indexes vers les vertexs compactés
+        shift = np.repeat(v_start - (np.cumsum(n_v) - n_v), n_t).astype(np.int32)
+        indexes = self.indexes_data[triangles] - shift[:, None]
+        return vertices, indexes, self.colors_data[triangles], self.faces_data[triangles]
+
+    @staticmethod
+    def reserve(data, size: int):
+        """renvoie un tableau d'au moins size lignes en conservant le contenu (doublement amorti)"""
+        if size <= len(data):
+            return data
+        capacity = max(size, 2 * len(data))
+        grown = np.empty((capacity,) + data.shape[1:], dtype=data.dtype)
+        grown[:len(data)] = data
+        return grown
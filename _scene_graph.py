@@ -0,0 +1,170 @@
+import numpy as np
+
+
+class SceneGraph:
+    """transformations de tous les objets stockées en tableaux contigus (structure de tableaux)
+
+    chaque noeud a une position, une rotation (degrés [pitch, yaw, roll]), une échelle et un parent éventuel
+    les modifications marquent le noeud comme sale, update() recalcule en une passe vectorisée
+    les matrices locales des noeuds sales puis les matrices monde de ces noeuds et de leurs descendants
+
+    chaque Environnement possède son graphe ; un objet hors de toute scène a son propre graphe (movable),
+    son noeud est recopié dans celui de la scène lors de l'ajout"""
+    def __init__(self, capacity: int=64, movable: bool=False):
+        self.count = 0
+        self.movable = movable # noeuds pouvant être déplacés dans un autre graphe (objets hors scène)
+        self.positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.rotations = np.zeros((capacity, 3), dtype=np.float32)
+        self.scales = np.ones((capacity, 3), dtype=np.float32)
+        self.parents = np.full(capacity, -1, dtype=np.int64) # -1 : racine
+        self.depths = np.zeros(capacity, dtype=np.int64) # profondeur dans la hiérarchie (0 : racine)
+        self.local = np.tile(np.eye(4, dtype=np.float32), (capacity, 1, 1)) # matrices locales (N, 4, 4)
+        self.world = np.tile(np.eye(4, dtype=np.float32), (capacity, 1, 1)) # matrices monde (N, 4, 4)
+        self.versions = np.zeros(capacity, dtype=np.int64) # incrémenté à chaque changement de matrice monde
+        self.dirty = np.zeros(capacity, dtype=bool) # transformation locale modifiée depuis le dernier update
+        self.pending = False # au moins un noeud sale
+        self.version = 0 # incrémenté à chaque modification d'un noeud
+        self.max_depth = 0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, position=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1), parent: int=-1):
+        """ajoute un noeud et renvoie son indice"""
+        if self.count == len(self.positions):
+            self.grow(2 * self.count)
+        node = self.count
+        self.count += 1
+        self.positions[node] = position
+        self.rotations[node] = rotation
+        self.scales[node] = scale
+        # nouveau noeud sans descendant : sa profondeur suffit (pas de recalcul de toute la hiérarchie)
+        self.parents[node] = parent
+        self.depths[node] = 0 if parent < 0 else self.depths[parent] + 1
+        self.max_depth = max(self.max_depth, int(self.depths[node]))
+        self.mark(node)
+        return node
+
+    def grow(self, capacity: int):
+        """agrandit les tableaux en conservant leur contenu"""
+        for name, fill in (("positions", 0), ("rotations", 0), ("scales", 1), ("parents", -1), ("depths", 0),
+                           ("versions", 0), ("dirty", False)):
+            data = getattr(self, name)
+            grown = np.full((capacity,) + data.shape[1:], fill, dtype=data.dtype)
+            grown[:len(data)] = data
+            setattr(self, name, grown)
+        for name in ("local", "world"):
+            data = getattr(self, name)
+            grown = np.tile(np.eye(4, dtype=np.float32), (capacity, 1, 1))
+            grown[:len(data)] = data
+            setattr(self, name, grown)
+
+    def set_parent(self, node: int, parent: int):
+        """rattache un noeud à un parent (-1 : racine), sa transformation devient relative au parent"""
+        ancestor = parent
+        while ancestor >= 0: # refus des cycles
+            if ancestor == node:
+                raise ValueError("un noeud ne peut pas être son propre ancêtre")
+            ancestor = self.parents[ancestor]
+        self.parents[node] = parent
+        self.update_depths()
+        self.mark(node)
+
+    def update_depths(self):
+        """recalcule la profondeur de chaque noeud"""
+        parents = self.parents[:self.count]
+        depths = np.zeros(self.count, dtype=np.int64)
+        current = parents.copy()
+        while (current >= 0).any(): # remontée simultanée de tous les noeuds
+            has_parent = current >= 0
+            depths[has_parent] += 1
+            current[has_parent] = parents[current[has_parent]]
+        self.depths[:self.count] = depths
+        self.max_depth = int(depths.max(initial=0))
+
+    def mark(self, node):
+        """marque un ou plusieurs noeuds comme modifiés"""
+        self.dirty[node] = True
+        self.pending = True
+        self.version += 1
+
+    def set_position(self, node, position):
+        self.positions[node] = position
+        self.mark(node)
+
+    def set_rotation(self, node, rotation):
+        self.rotations[node] = rotation
+        self.mark(node)
+
+    def set_scale(self, node, scale):
+        self.scales[node] = scale
+        self.mark(node)
+
+    def snapshot(self):
+        """renvoie une copie des transformations locales et de la hiérarchie (transmise à un autre processus)"""
+        n = self.count
+        return self.positions[:n].copy(), self.rotations[:n].copy(), self.scales[:n].copy(), self.parents[:n].copy()
+
+    def restore(self, snapshot):
+        """remplace les transformations par une copie obtenue avec snapshot(), seuls les noeuds modifiés sont marqués"""
+        positions, rotations, scales, parents = snapshot
+        n, m = len(positions), min(self.count, len(positions))
+        if n > len(self.positions):
+            self.grow(max(n, 2 * len(self.positions)))
+        changed = np.ones(n, dtype=bool) # noeuds ajoutés : toujours marqués
+        changed[:m] = ((self.positions[:m] != positions[:m]).any(axis=1) | (self.rotations[:m] != rotations[:m]).any(axis=1)
+                       | (self.scales[:m] != scales[:m]).any(axis=1) | (self.parents[:m] != parents[:m]))
+        hierarchy = n != self.count or (self.parents[:m] != parents[:m]).any()
+        self.positions[:n], self.rotations[:n], self.scales[:n], self.parents[:n] = positions, rotations, scales, parents
+        self.count = n
+        if hierarchy:
+            self.update_depths()
+        nodes = np.flatnonzero(changed)
+        if len(nodes):
+            self.mark(nodes)
+
+    def update(self):
+        """recalcule les matrices des noeuds sales et de leurs descendants, renvoie les noeuds mis à jour"""
+        if not self.pending:
+            return np.empty(0, dtype=np.int64)
+        n = self.count
+        dirty = self.dirty[:n]
+        nodes = np.flatnonzero(dirty)
+        self.local[nodes] = compose(self.positions[nodes], self.rotations[nodes], self.scales[nodes])
+
+        # propagation aux descendants niveau par niveau, puis matrice monde = monde du parent x locale
+        parents, depths = self.parents[:n], self.depths[:n]
+        changed = dirty.copy()
+        roots = np.flatnonzero(changed & (depths == 0))
+        self.world[roots] = self.local[roots]
+        for depth in range(1, self.max_depth + 1):
+            level = np.flatnonzero(depths == depth)
+            changed[level] |= changed[parents[level]]
+            level = level[changed[level]]
+            self.world[level] = self.world[parents[level]] @ self.local[level]
+
+        updated = np.flatnonzero(changed)
+        self.versions[updated] += 1
+        dirty[:] = False
+        self.pending = False
+        return updated
+
+
+def compose(positions, rotations, scales):
+    """renvoie les matrices T * Rz * Ry * Rx * S (N, 4, 4) de N transformations (rotations en degrés)"""
+    rx, ry, rz = np.radians(np.asarray(rotations, dtype=np.float64)).T
+    cx, sx = np.cos(rx), np.sin(rx)
+    cy, sy = np.cos(ry), np.sin(ry)
+    cz, sz = np.cos(rz), np.sin(rz)
+
+    matrices = np.zeros((len(rx), 4, 4), dtype=np.float32)
+    rotation = np.stack([
+        np.stack([cz * cy, cz * sy * sx - sz * cx, cz * sy * cx + sz * sx], axis=-1),
+        np.stack([sz * cy, sz * sy * sx + cz * cx, sz * sy * cx - cz * sx], axis=-1),
+        np.stack([-sy, cy * sx, cy * cx], axis=-1),
+    ], axis=1)
+    matrices[:, :3, :3] = rotation * np.asarray(scales)[:, None, :] # échelle appliquée aux colonnes
+    matrices[:, :3, 3] = positions
+    matrices[:, 3, 3] = 1
+    return matrices
+
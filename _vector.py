@@ -1,55 +1,169 @@
+import math
 import numpy as np
 
 
 class Vector:
-    """vecteur 3D optimisé avec numpy"""
-    __slots__ = ['data']
-    
+    """vecteur 3D scalaire (trois floats, sans numpy : un appel numpy coûte plus cher que le calcul sur 3 composantes)
+    pour des traitements sur de nombreux vecteurs, utiliser VectorArray"""
+    __slots__ = ['x', 'y', 'z']
+
     def __init__(self, x=0.0, y=0.0, z=0.0):
         if isinstance(x, (list, tuple, np.ndarray)):
-            self.data = np.array(x, dtype=np.float32)[:3]
-            if len(self.data) < 3:
-                self.data = np.pad(self.data, (0, 3 - len(self.data)))
+            values = [float(v) for v in x[:3]]
+            values += [0.0] * (3 - len(values))
+            self.x, self.y, self.z = values
         else:
-            self.data = np.array([x, y, z], dtype=np.float32)
-    
-    @property
-    def x(self): return self.data[0]
-    @property
-    def y(self): return self.data[1]
+            self.x, self.y, self.z = float(x), float(y), float(z)
+
     @property
-    def z(self): return self.data[2]
-    
-    @x.setter
-    def x(self, v): self.data[0] = v
-    @y.setter
-    def y(self, v): self.data[1] = v
-    @z.setter
-    def z(self, v): self.data[2] = v
-    
-    def __getitem__(self, i): return self.data[i]
-    def __setitem__(self, i, v): self.data[i] = v
+    def data(self):
+        """composantes sous forme de tableau numpy en lecture seule (copie : modifier x, y, z ou v[i])"""
+        data = np.array((self.x, self.y, self.z), dtype=np.float32)
+        data.flags.writeable = False # une écriture dans la copie échoue au lieu d'être perdue
+        return data
+
+    def __getitem__(self, i): return (self.x, self.y, self.z)[i]
+    def __setitem__(self, i, v): setattr(self, self.__slots__[i], float(v))
+    def __iter__(self): return iter((self.x, self.y, self.z))
+    def __len__(self): return 3
     def __repr__(self): return f"V({self.x:.2f}, {self.y:.2f}, {self.z:.2f})"
-    
-    def __add__(self, other): return Vector(self.data + other.data)
-    def __sub__(self, other): return Vector(self.data - other.data)
-    def __mul__(self, s): return Vector(self.data * s)
-    def __rmul__(self, s): return Vector(self.data * s)
-    def __truediv__(self, s): return Vector(self.data / s)
-    def __neg__(self): return Vector(-self.data)
-    
-    def dot(self, other): 
-        return float(np.dot(self.data, other.data))
-    
-    def cross(self, other): 
-        return Vector(np.cross(self.data, other.data))
-    
-    def length(self): 
-        return float(np.linalg.norm(self.data))
-    
+
+    def __add__(self, other): return Vector(self.x + other.x, self.y + other.y, self.z + other.z)
+    def __sub__(self, other): return Vector(self.x - other.x, self.y - other.y, self.z - other.z)
+    def __mul__(self, s): return Vector(self.x * s, self.y * s, self.z * s)
+    def __rmul__(self, s): return Vector(self.x * s, self.y * s, self.z * s)
+    def __truediv__(self, s): return Vector(self.x / s, self.y / s, self.z / s)
+    def __neg__(self): return Vector(-self.x, -self.y, -self.z)
+
+    # opérations en place (aucune allocation)
+    def __iadd__(self, other):
+        self.x += other.x
+        self.y += other.y
+        self.z += other.z
+        return self
+
+    def __isub__(self, other):
+        self.x -= other.x
+        self.y -= other.y
+        self.z -= other.z
+        return self
+
+    def __imul__(self, s):
+        self.x *= s
+        self.y *= s
+        self.z *= s
+        return self
+
+    def __itruediv__(self, s):
+        self.x /= s
+        self.y /= s
+        self.z /= s
+        return self
+
+    def dot(self, other):
+        return self.x * other.x + self.y * other.y + self.z * other.z
+
+    def cross(self, other):
+        return Vector(self.y * other.z - self.z * other.y,
+                      self.z * other.x - self.x * other.z,
+                      self.x * other.y - self.y * other.x)
+
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
     def normalized(self):
         l = self.length()
         return self / l if l > 1e-8 else Vector(0, 0, 0)
-    
+
+    def copy(self):
+        return Vector(self.x, self.y, self.z)
+
+
+class VectorArray:
+    """N vecteurs 3D stockés dans un tableau (N, 3) float32, opérations vectorisées sur tout le tableau"""
+    __slots__ = ['data']
+
+    def __init__(self, data):
+        if isinstance(data, int):
+            self.data = np.zeros((data, 3), dtype=np.float32)
+        else:
+            self.data = np.asarray(data, dtype=np.float32).reshape(-1, 3)
+
+    @classmethod
+    def from_vectors(cls, vectors):
+        """construit le tableau à partir d'une séquence de Vector"""
+        return cls(np.array([(v.x, v.y, v.z) for v in vectors], dtype=np.float32).reshape(-1, 3))
+
+    @property
+    def x(self): return self.data[:, 0]
+    @property
+    def y(self): return self.data[:, 1]
+    @property
+    def z(self): return self.data[:, 2]
+
+    def __len__(self): return len(self.data)
+    def __repr__(self): return f"VectorArray({len(self.data)})"
+
+    def __getitem__(self, i):
+        """un indice entier renvoie un Vector, une tranche ou un masque un VectorArray"""
+        if isinstance(i, (int, np.integer)):
+            return Vector(*self.data[i].tolist())
+        return VectorArray(self.data[i])
+
+    def __setitem__(self, i, v):
+        self.data[i] = (v.x, v.y, v.z) if isinstance(v, Vector) else getattr(v, 'data', v)
+
+    @staticmethod
+    def operand(other):
+        """tableau (N, 3), composantes (3,), scalaires par vecteur (N, 1) ou scalaire utilisable avec numpy"""
+        if isinstance(other, VectorArray):
+            return other.data
+        if isinstance(other, Vector):
+            return np.array((other.x, other.y, other.z), dtype=np.float32)
+        other = np.asarray(other, dtype=np.float32)
+        if other.ndim == 1 and len(other) != 3: # ambigu si N == 3 : forme (N, 1) exigée
+            raise ValueError("un scalaire par vecteur doit être de forme (N, 1), un tableau (3,) désigne des composantes")
+        return other
+
+    def __add__(self, other): return VectorArray(self.data + self.operand(other))
+    def __sub__(self, other): return VectorArray(self.data - self.operand(other))
+    def __mul__(self, s): return VectorArray(self.data * self.operand(s))
+    def __rmul__(self, s): return VectorArray(self.data * self.operand(s))
+    def __truediv__(self, s): return VectorArray(self.data / self.operand(s))
+    def __neg__(self): return VectorArray(-self.data)
+
+    # opérations en place (dans le tampon existant)
+    def __iadd__(self, other):
+        self.data += self.operand(other)
+        return self
+
+    def __isub__(self, other):
+        self.data -= self.operand(other)
+        return self
+
+    def __imul__(self, s):
+        self.data *= self.operand(s)
+        return self
+
+    def __itruediv__(self, s):
+        self.data /= self.operand(s)
+        return self
+
+    def dot(self, other):
+        """produits scalaires (N,)"""
+        return np.einsum('ij,ij->i', self.data, np.broadcast_to(self.operand(other), self.data.shape))
+
+    def cross(self, other):
+        return VectorArray(np.cross(self.data, self.operand(other)))
+
+    def length(self):
+        """normes (N,)"""
+        return np.sqrt(np.einsum('ij,ij->i', self.data, self.data))
+
+    def normalized(self):
+        """vecteurs unitaires (les vecteurs quasi nuls restent nuls)"""
+        l = self.length()
+        return VectorArray(np.divide(self.data, l[:, None], out=np.zeros_like(self.data), where=l[:, None] > 1e-8))
+
     def copy(self):
-        return Vector(self.data.copy())
\ No newline at end of file
+        return VectorArray(self.data.copy())
@@ -0,0 +1,53 @@
+"""benchmark du frustum culling : coût de screen_batch en fonction du nombre d'objets de la scène
+
+usage : python benchmarks/bench_frustum_culling.py [nombre maximal de cubes]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _main import Main
+from _env import Cube
+
+
+def timed_frame(env, repeat: int=5):
+    """renvoie (nombre de triangles, meilleur temps) de screen_batch"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        batch = env.screen_batch()
+        best = min(best, time.perf_counter() - start)
+    return len(batch), best
+
+
+def main():
+    max_cubes = int(sys.argv[1]) if len(sys.argv) > 1 else 32_000
+    app = Main()
+    env = app.env
+    app.pov.pos[:] = (0, 1, 5)
+    app.pov.update_view_matrix()
+
+    # grille de cubes au sol, s'étendant dans toutes les directions autour de la caméra
+    print(f"{'cubes':>8} {'triangles':>17} {'sans culling':>13} {'avec culling':>13} {'accél.':>7}")
+    count = len(env.scene_buffer.entries)
+    side = 1
+    while count < max_cubes:
+        side *= 2
+        for i in range(-side, side):
+            for k in range(-side, side):
+                if max(abs(i + 0.5), abs(k + 0.5)) > side / 2:
+                    env.add(Cube([i * 3, 0, k * 3], 1))
+        count = len(env.scene_buffer.entries)
+
+        env.frustum_culling = False
+        n_all, t_all = timed_frame(env)
+        env.frustum_culling = True
+        n_cull, t_cull = timed_frame(env)
+        print(f"{count:>8} {n_all:>8} / {n_cull:>6} {t_all * 1000:>10.1f} ms {t_cull * 1000:>10.1f} ms {t_all / t_cull:>6.1f}x")
+    env.data_manager.shutdown()
+
+
+if __name__ == "__main__":
+    main()
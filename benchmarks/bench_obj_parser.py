@@ -0,0 +1,154 @@
+"""benchmark du chargeur .obj : analyse ligne par ligne d'origine contre analyse vectorisée
+
+usage : python benchmarks/bench_obj_parser.py [nombre de lignes]
+(vérifie aussi l'analyse par blocs et les cas particuliers : commentaires en fin de ligne, fichier vide)
+"""
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _data_manager import flat_if_empty, parse_obj_bytes, parse_obj_file
+
+
+def reference_load_obj(filepath: str):
+    """chargeur ligne par ligne d'origine (référence des résultats)"""
+    vertices = []
+    indexes = []
+    with open(filepath, 'r') as f:
+        for line in f:
+            if line.startswith('v '):
+                parts = line.strip().split()
+                x, y, z = map(float, parts[1:4])
+                vertices.append([x, y, z])
+
+            elif line.startswith('f '):
+                parts = line.strip().split()[1:]
+                face_indices = [int(p.split('/')[0]) - 1 for p in parts]
+                if len(face_indices) == 3:
+                    indexes.append(face_indices)
+                elif len(face_indices) == 4:
+                    indexes.append([face_indices[0], face_indices[1], face_indices[2]])
+                    indexes.append([face_indices[0], face_indices[2], face_indices[3]])
+                else:
+                    for i in range(1, len(face_indices) - 1):
+                        indexes.append([face_indices[0], face_indices[i], face_indices[i+1]])
+    return np.array(vertices, dtype=np.float32), np.array(indexes, dtype=np.int32)
+
+
+def generate_obj(filepath: str, n_lines: int, seed: int=0):
+    """écrit un fichier .obj synthétique mêlant triangles, quads, n-gones et les 4 formes d'indices"""
+    rng = np.random.default_rng(seed)
+    n_vertices = n_lines // 4
+    n_faces = n_lines - 3 * n_vertices
+
+    with open(filepath, 'w') as f:
+        f.write("# obj synthétique\nmtllib bench.mtl\no bench\n")
+        coords = rng.uniform(-100, 100, (n_vertices, 3))
+        f.write("".join(f"v {x:.4f} {y:.4f} {z:.4f}\n" for x, y, z in coords.tolist()))
+        f.write("".join(f"vt {x * 0.01:.4f} {y * 0.01:.4f}\n" for x, y, _ in coords.tolist()))
+        f.write("".join(f"vn {x * 0.01:.4f} {y * 0.01:.4f} {z * 0.01:.4f}\n" for x, y, z in coords.tolist()))
+
+        arity = rng.choice([3, 4, 5, 6], size=n_faces, p=[0.45, 0.45, 0.05, 0.05])
+        forms = rng.integers(0, 4, size=n_faces)
+        indices = rng.integers(1, n_vertices + 1, size=arity.sum()).tolist()
+        lines = []
+        k = 0
+        for a, form in zip(arity.tolist(), forms.tolist()):
+            face = indices[k:k + a]
+            k += a
+            if form == 0:
+                tokens = [str(i) for i in face]
+            elif form == 1:
+                tokens = [f"{i}/{i}" for i in face]
+            elif form == 2:
+                tokens = [f"{i}//{i}" for i in face]
+            else:
+                tokens = [f"{i}/{i}/{i}" for i in face]
+            lines.append("f " + " ".join(tokens) + "\n")
+        f.write("".join(lines))
+
+
+def timed(function, *args, repeat: int=1):
+    """renvoie (résultat, meilleur temps)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def vectorized_load_obj(filepath: str):
+    """chargeur vectorisé (lecture unique du fichier)"""
+    with open(filepath, 'rb') as f:
+        vertices, indexes = parse_obj_bytes(f.read())
+    return flat_if_empty(vertices), flat_if_empty(indexes)
+
+
+def chunked_load_obj(filepath: str, chunk_size: int=1 << 20):
+    """chargeur par blocs utilisé par l'application"""
+    return parse_obj_file(filepath, chunk_size)
+
+
+EDGE_CASES = {
+    "commentaires": "# en-tête\nv 1 2 3 # premier sommet\nv 4.5 5 6 #sans espace après\nv 7 8 9\n# fin\nf 1 2 3\n",
+    "fichier vide": "",
+    "commentaires seuls": "# aucun sommet\n",
+    "sans retour final": "v 1 2 3\nv 4 5 6\nv 7 8 9\nf 1 2 3",
+    "sommets et faces dans des blocs séparés": "v 1 2 3\nv 4 5 6\nv 7 8 9\nv 1 1 1\n" + "f 1 2 3 4\n" * 4,
+}
+EDGE_CHUNK_SIZE = 16 # lignes coupées entre deux blocs, blocs de sommets sans face
+
+
+def same_mesh(a, b):
+    """compare deux résultats (vertices, indexes), formes comprises"""
+    return all(x.shape == y.shape and np.array_equal(x, y) for x, y in zip(a, b))
+
+
+def check_edge_cases(directory: str):
+    """compare les chargeurs sur les cas particuliers, renvoie la liste des cas différents"""
+    failed = []
+    for name, content in EDGE_CASES.items():
+        filepath = os.path.join(directory, "edge.obj")
+        with open(filepath, 'w') as f:
+            f.write(content)
+        reference = reference_load_obj(filepath)
+        for loader, args in ((vectorized_load_obj, ()), (chunked_load_obj, (EDGE_CHUNK_SIZE,))):
+            try:
+                identical = same_mesh(reference, loader(filepath, *args))
+            except ValueError:
+                identical = False
+            if not identical:
+                failed.append(f"{name} ({loader.__name__})")
+    return failed
+
+
+def main():
+    n_lines = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 2_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        filepath = os.path.join(directory, "bench.obj")
+        failed = check_edge_cases(directory)
+        generate_obj(filepath, n_lines)
+        size = os.path.getsize(filepath) / 1e6
+
+        (v_ref, i_ref), t_ref = timed(reference_load_obj, filepath)
+        (v_new, i_new), t_new = timed(vectorized_load_obj, filepath, repeat=3)
+        (v_chunk, i_chunk), t_chunk = timed(chunked_load_obj, filepath, repeat=3)
+        small_chunks = chunked_load_obj(filepath, 1 << 16) # blocs de sommets et de faces séparés
+
+    identical = same_mesh((v_ref, i_ref), (v_new, i_new))
+    chunked = same_mesh((v_ref, i_ref), (v_chunk, i_chunk)) and same_mesh((v_ref, i_ref), small_chunks)
+    print(f"fichier : {n_lines} lignes, {size:.1f} Mo, {len(v_ref)} vertexs, {len(i_ref)} triangles")
+    print(f"référence  : {t_ref:8.3f} s")
+    print(f"vectorisé  : {t_new:8.3f} s")
+    print(f"par blocs  : {t_chunk:8.3f} s")
+    print(f"accélération : x{t_ref / t_new:.1f}, résultats identiques : {identical}, par blocs : {chunked}")
+    print(f"cas particuliers : {'identiques' if not failed else 'différents : ' + ', '.join(failed)}")
+    return 0 if identical and chunked and not failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
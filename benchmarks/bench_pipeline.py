@@ -0,0 +1,217 @@
+"""suite de benchmarks headless du pipeline de rendu (pilote vidéo SDL "dummy", aucune fenêtre)
+
+rejoue des trajectoires de caméra scriptées sur des scènes générées de taille croissante et écrit,
+pour chaque combinaison (scène, trajectoire, mode de rendu, profondeur de pipeline), une ligne JSON :
+images/s, triangles/s, percentiles du temps de frame, temps et pic mémoire de chaque étape
+
+usage : python benchmarks/bench_pipeline.py [--frames N] [--scenes cubes,instanced_cubes,humans,synthetic]
+        [--paths orbit,flythrough] [--backends painter,zbuffer] [--pipelines 0,2] [--max-triangles N] [--output fichier.jsonl]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from _main import Main
+from _env import Cube, Object
+from _data_manager import load_obj_file
+from _lod import load_lods
+from _instancing import InstancedMesh, translation
+
+
+# ___________________________________________________________ Scènes ___________________________________________________________
+def cube_scene(env, count: int):
+    """grille carrée de count cubes au sol, renvoie le rayon de la scène"""
+    side = math.ceil(math.sqrt(count))
+    for n in range(count):
+        i, k = n % side - side / 2, n // side - side / 2
+        env.add(Cube([i * 2, 0, k * 2], 1, color=[(255, 0, 0), (0, 255, 0), (0, 0, 255)]))
+    return side
+
+
+def instanced_cube_scene(env, count: int):
+    """même grille que cube_scene, avec un seul mesh partagé instancié"""
+    side = math.ceil(math.sqrt(count))
+    cubes = env.add_instances(InstancedMesh(Cube.create_mesh([0, 0, 0], 1, color=[(255, 0, 0), (0, 255, 0), (0, 0, 255)])))
+    n = np.arange(count)
+    cubes.add_many([translation([i * 2, 0, k * 2]) for i, k in zip((n % side - side / 2).tolist(), (n // side - side / 2).tolist())])
+    return side
+
+
+def human_scene(env, count: int):
+    """count copies de human.obj (et de ses niveaux de détail) en ligne, renvoie le rayon de la scène"""
+    path = env.main.get_path("objects/human.obj")
+    vertices, indexes = load_obj_file(path)
+    lods = load_lods(path, vertices, indexes)
+    side = math.ceil(math.sqrt(count))
+    for n in range(count):
+        human = Object(vertices, indexes, colors=(200, 170, 150), lods=lods)
+        human.set_position([(n % side - side / 2) * 8, -8, (n // side - side / 2) * 8])
+        env.add(human)
+    return max(side * 4, 10)
+
+
+def sphere_mesh(n_triangles: int):
+    """sphère UV de rayon 1 d'environ n_triangles triangles"""
+    rings = max(2, int(math.sqrt(n_triangles / 2)))
+    segments = max(3, n_triangles // (2 * rings))
+    theta = np.linspace(0, np.pi, rings + 1)
+    phi = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+    t, p = np.meshgrid(theta, phi, indexing='ij')
+    vertices = np.stack([np.sin(t) * np.cos(p), np.cos(t), np.sin(t) * np.sin(p)], axis=-1).reshape(-1, 3)
+
+    r, s = np.meshgrid(np.arange(rings), np.arange(segments), indexing='ij')
+    a = r * segments + s
+    b = r * segments + (s + 1) % segments
+    c, d = a + segments, b + segments
+    indexes = np.concatenate([np.stack([a, c, b], -1).reshape(-1, 3), np.stack([b, c, d], -1).reshape(-1, 3)])
+    colors = np.where((np.arange(len(indexes)) // 2 % 2)[:, None] == 0, [220, 120, 60], [60, 120, 220])
+    return vertices.astype(np.float32), indexes.astype(np.int32), colors.astype(np.uint8)
+
+
+def synthetic_scene(env, n_triangles: int):
+    """une sphère de n_triangles triangles, renvoie le rayon de la scène"""
+    vertices, indexes, colors = sphere_mesh(n_triangles)
+    sphere = Object(vertices, indexes, colors=colors)
+    sphere.set_scale([4, 4, 4])
+    env.add(sphere)
+    return 6
+
+
+SCENES = {
+    "cubes": (cube_scene, [100, 1_000, 10_000]),
+    "instanced_cubes": (instanced_cube_scene, [100, 1_000, 10_000, 100_000]),
+    "humans": (human_scene, [1, 4, 16]),
+    "synthetic": (synthetic_scene, [10_000, 100_000, 1_000_000, 10_000_000]),
+}
+
+
+# ___________________________________________________________ Trajectoires ___________________________________________________________
+def look_at(pov, position, target):
+    """place la caméra en position, orientée vers target"""
+    direction = np.asarray(target, dtype=np.float32) - np.asarray(position, dtype=np.float32)
+    direction /= np.linalg.norm(direction)
+    pov.pos[:] = position
+    pov.yaw = math.degrees(math.atan2(direction[0], -direction[2]))
+    pov.pitch = -math.degrees(math.asin(direction[1]))
+    pov.update_view_matrix()
+
+
+def orbit_path(pov, t: float, radius: float):
+    """tour complet autour de la scène, légèrement en hauteur"""
+    angle = 2 * math.pi * t
+    distance = radius * 1.5 + 3
+    look_at(pov, (distance * math.sin(angle), radius * 0.4 + 1, distance * math.cos(angle)), (0, 0, 0))
+
+
+def flythrough_path(pov, t: float, radius: float):
+    """traversée de la scène en ligne droite à hauteur d'homme"""
+    z = (radius + 3) * (1 - 2 * t)
+    look_at(pov, (0.5, 1.5, z), (0.5, 1.5, z - 1))
+
+
+PATHS = {"orbit": orbit_path, "flythrough": flythrough_path}
+
+
+# ___________________________________________________________ Mesure ___________________________________________________________
+def run(app, path, radius: float, frames: int):
+    """rejoue une trajectoire et renvoie les temps de frame (s)"""
+    profiler = app.profiler
+    times = []
+    for frame in range(frames):
+        path(app.pov, frame / max(frames - 1, 1), radius)
+        start = time.perf_counter()
+        profiler.begin_frame()
+        app.draw_frame()
+        profiler.end_frame()
+        times.append(time.perf_counter() - start)
+    return np.array(times)
+
+
+def measure(scene: str, size: int, path_name: str, backend: str, frames: int, pipeline: int=0):
+    """construit la scène, rejoue la trajectoire et renvoie le résultat (dictionnaire)
+    pipeline : frames en cours de calcul dans le processus de géométrie (0 : rendu séquentiel)"""
+    app = Main(default_scene=False)
+    build, _ = SCENES[scene]
+    radius = build(app.env, size)
+    app.renderer.backend = backend
+    app.set_pipeline(pipeline)
+    path = PATHS[path_name]
+
+    # préchauffage (caches, BVH, niveaux de détail)
+    run(app, path, radius, 2)
+    app.profiler.reset()
+
+    times = run(app, path, radius, frames)
+    stats = app.profiler.stats()
+    counters = app.profiler.counter_stats()
+
+    # pic mémoire par étape : passe séparée (tracemalloc ralentit fortement le rendu)
+    app.profiler.set_memory(True)
+    run(app, path, radius, min(frames, 5))
+    memory = {name: round(peak / 1e6, 3) for name, peak in app.profiler.memory_peaks.items()}
+    app.profiler.set_memory(False)
+    app.env.data_manager.shutdown()
+    app.set_pipeline(0)
+
+    total = times.sum()
+    return {
+        "scene": scene,
+        "size": size,
+        "scene_triangles": int(app.env.scene_buffer.n_triangles + sum(len(i) * len(i.mesh.indexes) for i in app.env.instances)),
+        "path": path_name,
+        "backend": backend,
+        "pipeline": pipeline,
+        "resolution": list(app.renderer.size),
+        "frames": frames,
+        "fps": round(frames / total, 3),
+        "triangles_per_s": round(counters.get("triangles.in", 0) * frames / total, 1),
+        "drawn_per_s": round(counters.get("triangles.drawn", 0) * frames / total, 1),
+        "frame_ms": {key: round(value, 3) for key, value in stats["frame"].items()},
+        "stages_ms": {name: round(values["mean"], 3) for name, values in stats.items() if name != "frame"},
+        "counters": counters,
+        "memory_mb": memory,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--scenes", default=",".join(SCENES))
+    parser.add_argument("--paths", default=",".join(PATHS))
+    parser.add_argument("--backends", default="painter,zbuffer")
+    parser.add_argument("--pipelines", default="0", help="profondeurs de pipeline mesurées (0 : rendu séquentiel)")
+    parser.add_argument("--max-triangles", type=int, default=1_000_000, help="taille maximale des scènes synthétiques")
+    parser.add_argument("--output", help="fichier JSON lines (sortie standard par défaut)")
+    args = parser.parse_args()
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    machine = {"python": platform.python_version(), "numpy": np.__version__, "cpus": os.cpu_count(), "platform": platform.platform()}
+    try:
+        for scene in args.scenes.split(","):
+            for size in SCENES[scene][1]:
+                if scene == "synthetic" and size > args.max_triangles:
+                    continue
+                for path_name in args.paths.split(","):
+                    for backend in args.backends.split(","):
+                        for pipeline in map(int, args.pipelines.split(",")):
+                            result = measure(scene, size, path_name, backend, args.frames, pipeline)
+                            result["machine"] = machine
+                            output.write(json.dumps(result) + "\n")
+                            output.flush()
+                            print(f"{scene:>10} {size:>9} {path_name:>10} {backend:>8} {pipeline:>2} : {result['fps']:8.2f} fps, "
+                                  f"{result['triangles_per_s'] / 1e6:8.2f} Mtri/s", file=sys.stderr)
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
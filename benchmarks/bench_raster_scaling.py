@@ -0,0 +1,71 @@
+"""benchmark de la rastérisation par tuiles : débit en fonction du nombre de threads
+
+usage : python benchmarks/bench_raster_scaling.py [nombre de triangles] [largeur] [hauteur]
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _env import TriangleBatch
+from _rasterizer import ZBufferRasterizer
+
+
+def random_batch(n_triangles: int, size: tuple, seed: int=0):
+    """lot de triangles aléatoires de tailles variées (petits en majorité, quelques grands)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform((0, 0), size, (n_triangles, 1, 2))
+    radius = np.minimum(rng.pareto(2.0, (n_triangles, 1, 1)) * 6 + 2, 64)
+    angles = rng.uniform(0, 2 * np.pi, (n_triangles, 1)) + np.array([0, 2.1, 4.2])
+    offsets = np.stack([np.cos(angles), np.sin(angles)], axis=-1) * radius
+    screen = centers + offsets
+    z = rng.uniform(-1, 1, (n_triangles, 3))
+    colors = rng.integers(0, 256, (n_triangles, 3))
+    return TriangleBatch(screen, z.mean(axis=1), colors, z)
+
+
+def worker_counts():
+    """1, 2, 4... jusqu'au nombre de coeurs (inclus)"""
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 < cores:
+        counts.append(counts[-1] * 2)
+    if cores > 1:
+        counts.append(cores)
+    return counts
+
+
+def main():
+    n_triangles = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    size = (int(sys.argv[2]), int(sys.argv[3])) if len(sys.argv) > 3 else (1920, 1080)
+    batch = random_batch(n_triangles, size)
+    reference = None
+
+    print(f"{n_triangles} triangles, {size[0]}x{size[1]}, {os.cpu_count()} coeurs")
+    print(f"{'threads':>8} {'ms/frame':>10} {'Mtri/s':>8} {'accél.':>7}")
+    base = None
+    for workers in worker_counts():
+        rasterizer = ZBufferRasterizer(size, workers=workers)
+        rasterizer.clear((0, 0, 0))
+        rasterizer.draw(batch) # préchauffage (création des threads)
+
+        times = []
+        for _ in range(5):
+            rasterizer.clear((0, 0, 0))
+            start = time.perf_counter()
+            rasterizer.draw(batch)
+            times.append(time.perf_counter() - start)
+        best = min(times)
+        base = base or best
+
+        # toutes les configurations doivent produire la même image
+        if reference is None:
+            reference = rasterizer.color.copy()
+        identical = np.array_equal(reference, rasterizer.color)
+        print(f"{workers:>8} {best * 1000:>10.1f} {n_triangles / best / 1e6:>8.2f} {base / best:>6.2f}x"
+              + ("" if identical else "  (image différente !)"))
+
+
+if __name__ == "__main__":
+    main()
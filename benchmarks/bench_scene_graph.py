@@ -0,0 +1,95 @@
+"""benchmark du graphe de scène : mise à jour des transformations de N objets déplacés à chaque frame
+
+compare l'ancienne mise à jour par objet (trois matrices de rotation construites à chaque setter)
+à la mise à jour groupée du graphe de scène (une passe vectorisée sur les noeuds modifiés)
+
+usage : python benchmarks/bench_scene_graph.py [nombre maximal d'objets]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from _scene_graph import SceneGraph
+
+
+class LegacyTransform:
+    """transformation par objet telle qu'implémentée avant le graphe de scène (référence)"""
+    def __init__(self):
+        self.position = np.array([0, 0, 0], dtype=np.float32)
+        self.rotation = np.array([0, 0, 0], dtype=np.float32)
+        self.scale = np.array([1, 1, 1], dtype=np.float32)
+        self.transform_matrix = np.eye(4, dtype=np.float32)
+
+    def update_transform_matrix(self):
+        rx, ry, rz = np.radians(self.rotation)
+        Rx = np.array([[1, 0, 0, 0], [0, np.cos(rx), -np.sin(rx), 0], [0, np.sin(rx), np.cos(rx), 0], [0, 0, 0, 1]], dtype=np.float32)
+        Ry = np.array([[np.cos(ry), 0, np.sin(ry), 0], [0, 1, 0, 0], [-np.sin(ry), 0, np.cos(ry), 0], [0, 0, 0, 1]], dtype=np.float32)
+        Rz = np.array([[np.cos(rz), -np.sin(rz), 0, 0], [np.sin(rz), np.cos(rz), 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]], dtype=np.float32)
+        S = np.diag([*self.scale, 1])
+        T = np.eye(4, dtype=np.float32)
+        T[:3, 3] = self.position
+        self.transform_matrix = (T @ Rz @ Ry @ Rx @ S).astype(np.float32)
+
+    def set_position(self, pos):
+        self.position[:] = pos
+        self.update_transform_matrix()
+
+    def set_rotation(self, rot):
+        self.rotation[:] = rot
+        self.update_transform_matrix()
+
+
+def best_time(function, repeat: int=5):
+    """meilleur temps d'exécution (s)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    max_objects = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rng = np.random.default_rng(0)
+    print(f"{'objets':>8} {'par objet':>12} {'graphe':>12} {'accél.':>7} {'hiérarchie':>12}")
+    count = 100
+    while count <= max_objects:
+        positions = rng.normal(size=(count, 3)).astype(np.float32)
+        rotations = rng.uniform(-180, 180, (count, 3)).astype(np.float32)
+
+        # référence : deux setters par objet, chacun recalculant la matrice
+        legacy = [LegacyTransform() for _ in range(count)]
+        def legacy_frame():
+            for obj, position, rotation in zip(legacy, positions, rotations):
+                obj.set_position(position)
+                obj.set_rotation(rotation)
+
+        # graphe de scène : mêmes setters, une seule mise à jour groupée
+        graph = SceneGraph(count)
+        nodes = [graph.add() for _ in range(count)]
+        def graph_frame():
+            for node, position, rotation in zip(nodes, positions, rotations):
+                graph.set_position(node, position)
+                graph.set_rotation(node, rotation)
+            graph.update()
+
+        # hiérarchie : arbres de profondeur 4, seules les racines bougent (descendants propagés)
+        tree = SceneGraph(count)
+        for n in range(count):
+            tree.add(positions[n], rotations[n], parent=-1 if n % 4 == 0 else n - 1)
+        roots = np.arange(0, count, 4)
+        def tree_frame():
+            tree.positions[roots] += 0.01
+            tree.mark(roots)
+            tree.update()
+
+        t_legacy, t_graph, t_tree = best_time(legacy_frame), best_time(graph_frame), best_time(tree_frame)
+        print(f"{count:>8} {t_legacy * 1000:>9.2f} ms {t_graph * 1000:>9.2f} ms {t_legacy / t_graph:>6.1f}x {t_tree * 1000:>9.2f} ms")
+        count *= 10
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""micro-benchmarks des vecteurs 3D : ancienne implémentation numpy, Vector scalaire et VectorArray
+
+usage : python benchmarks/bench_vector.py [nombre de vecteurs]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from _vector import Vector, VectorArray
+
+
+class NumpyVector:
+    """vecteur 3D tel qu'implémenté avant (un tableau numpy de 3 éléments par vecteur, référence)"""
+    __slots__ = ['data']
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        if isinstance(x, (list, tuple, np.ndarray)):
+            self.data = np.array(x, dtype=np.float32)[:3]
+        else:
+            self.data = np.array([x, y, z], dtype=np.float32)
+
+    def __add__(self, other): return NumpyVector(self.data + other.data)
+    def __mul__(self, s): return NumpyVector(self.data * s)
+    def dot(self, other): return float(np.dot(self.data, other.data))
+    def cross(self, other): return NumpyVector(np.cross(self.data, other.data))
+    def length(self): return float(np.linalg.norm(self.data))
+
+    def normalized(self):
+        l = self.length()
+        return NumpyVector(self.data / l) if l > 1e-8 else NumpyVector(0, 0, 0)
+
+
+def per_op(statement, namespace, number: int):
+    """meilleur temps par exécution (µs)"""
+    return min(timeit.repeat(statement, globals=namespace, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    a, b = NumpyVector(1, 2, 3), NumpyVector(-2, 0.5, 4)
+    u, v = Vector(1, 2, 3), Vector(-2, 0.5, 4)
+
+    # opérations sur un vecteur
+    print(f"{'opération':<14} {'numpy':>10} {'scalaire':>10} {'accél.':>7}")
+    for name, statement in [("a + b", "a + b"), ("a * 2", "a * 2.0"), ("a.dot(b)", "a.dot(b)"),
+                            ("a.cross(b)", "a.cross(b)"), ("a.length()", "a.length()"), ("a.normalized()", "a.normalized()")]:
+        t_numpy = per_op(statement, {"a": a, "b": b}, 20_000)
+        t_scalar = per_op(statement, {"a": u, "b": v}, 20_000)
+        print(f"{name:<14} {t_numpy:>7.2f} µs {t_scalar:>7.2f} µs {t_numpy / t_scalar:>6.1f}x")
+    t_inplace = per_op("a.__iadd__(b)", {"a": u.copy(), "b": v}, 20_000)
+    print(f"{'a += b':<14} {'':>10} {t_inplace:>7.2f} µs")
+
+    # traitement de n vecteurs : boucle sur des vecteurs individuels contre VectorArray
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(n, 3)).astype(np.float32)
+    numpy_vectors = [NumpyVector(p) for p in data]
+    scalar_vectors = [Vector(*p) for p in data.tolist()]
+    array = VectorArray(data)
+    offset = Vector(0.5, 0.5, 0.5)
+    loops = {
+        "numpy": ("[(p + o).normalized() for p in vs]", {"vs": numpy_vectors, "o": NumpyVector(0.5, 0.5, 0.5)}),
+        "scalaire": ("[(p + o).normalized() for p in vs]", {"vs": scalar_vectors, "o": offset}),
+        "VectorArray": ("(vs + o).normalized()", {"vs": array, "o": offset}),
+    }
+    print(f"\n(p + o).normalized() sur {n} vecteurs")
+    reference = None
+    for name, (statement, namespace) in loops.items():
+        t = per_op(statement, namespace, 3) / 1000
+        reference = reference or t
+        print(f"{name:<14} {t:>8.2f} ms {reference / t:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()